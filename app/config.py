@@ -17,22 +17,129 @@ Usage:
     cfg = load_config()
     db_path = cfg["DB_PATH"]
 
-Returned configuration is a nested dictionary suitable for use throughout the
-application.
+Returned configuration is an immutable `AppConfig` that supports both attribute
+and `cfg["KEY"]` access, suitable for sharing throughout the application.
 """
 
-import configparser, os, sys
+import math, os, re, sys
+from dataclasses import dataclass
+from functools import cache, lru_cache
 from pathlib import Path
+from types import MappingProxyType
+
+__all__ = ("AppConfig", "load_config")
+
+_SECTION_RE = re.compile(r"\[([^\]]+)\][ \t]*")
+_KV_RE = re.compile(r"([^=:;#\s][^=:]*?)[ \t]*=[ \t]*(.*?)[ \t]*")
+
+def _parse_ini(text: str):
+    """Parse flat `key = value` INI text into `{section: {key: value}}`.
+
+    Matches ConfigParser for the subset this app uses: full-line `;`/`#`
+    comments, lower-cased option names, stripped values.
+
+    Returns:
+        dict or None: None if any line falls outside that subset (`key: value`,
+        indented continuation lines, `[DEFAULT]`, duplicate sections or
+        options, options before the first section, or a line that is not a
+        section, option or comment), so the caller can hand the file to
+        ConfigParser, which then parses it or raises as it always did.
+    """
+    sections = {}
+    sec = None
+    for line in text.splitlines():
+        if not line.strip() or line.lstrip()[0] in ";#":
+            continue
+        if line[0] in " \t":
+            return None
+        m = _KV_RE.fullmatch(line)
+        if m:
+            key = m.group(1).lower()
+            if sec is None or key in sec:
+                return None
+            sec[key] = m.group(2)
+            continue
+        m = _SECTION_RE.fullmatch(line)
+        if not m or m.group(1) == "DEFAULT" or m.group(1) in sections:
+            return None
+        sec = sections[m.group(1)] = {}
+    return sections
+
+@lru_cache(maxsize=4)
+def _read_ini_file(path: str, mtime_ns: int, size: int):
+    """Read and parse one INI file, memoized on its stat fingerprint.
+
+    Returns:
+        tuple[str, dict | None]: The raw text and its `_parse_ini` result.
+    """
+    text = Path(path).read_text(encoding="utf-8")
+    return text, _parse_ini(text)
+
+def _read_ini(file_key):
+    """Read and merge INI files in order into a dict of section dicts.
+
+    Args:
+        file_key: `(path, st_mtime_ns, st_size)` tuples of the files to read.
+            Files whose fingerprint is unchanged are not re-read.
+
+    Files that use ExtendedInterpolation syntax (`${...}` or `$$`), or that
+    `_parse_ini` cannot handle, are handed to ConfigParser so substitutions
+    still resolve and malformed lines still raise; everything else goes
+    through the regex fast path.
+    """
+    loaded = [_read_ini_file(*k) for k in file_key]
+    if any(p is None or "${" in t or "$$" in t for t, p in loaded):
+        import configparser
+        cp = configparser.ConfigParser(interpolation=configparser.ExtendedInterpolation())
+        for t, _ in loaded:
+            cp.read_string(t)
+        return {name: dict(cp[name]) for name in cp.sections()}
+    merged = {}
+    for _, parsed in loaded:
+        for name, sec in parsed.items():
+            merged.setdefault(name, {}).update(sec)
+    return merged
+
+_TOKEN_RE = re.compile(r"[^,\s][^,]*[^,\s]|[^,\s]")
+# os.path.expandvars syntax in one alternation, scanned left to right.
+# ntpath: '...' spans are literal, %% and $$ collapse, %VAR%, ${VAR} and
+# $VAR (letters, digits, _ and -), unterminated forms kept as-is.
+# posixpath: only $VAR and ${VAR}.
+_VAR_RE_NT = re.compile(
+    r"'[^']*'|'.*|%%|%([^%]*)%|%.*|\$\$|\$\{([^}]*)\}|\$\{.*|\$([-\w]*)",
+    re.ASCII | re.S,
+)
+_VAR_RE_POSIX = re.compile(r"\$(\w+)|\$\{([^}]+)\}", re.ASCII)
+_VAR_RE = _VAR_RE_NT if os.name == "nt" else _VAR_RE_POSIX
+
+def _sub_var(m):
+    """Replacement for one `_VAR_RE` match (unknown variables stay as written)."""
+    text = m.group(0)
+    if text == "%%" or text == "$$":
+        return text[0]
+    name = m.group(m.lastindex) if m.lastindex else ""
+    return os.environ.get(name, text) if name else text
+
+def _expand(s: str) -> str:
+    """Expand environment variables in `s` exactly as `os.path.expandvars` does.
+
+    One regex pass with the platform's rules: `%VAR%`, `%%` and quoted spans
+    on Windows, `$VAR`/`${VAR}` everywhere.
+    """
+    if "$" not in s and "%" not in s:
+        return s
+    return _VAR_RE.sub(_sub_var, s)
 
 def _split_list(s: str):
-    """Split a comma-separated string into a list of stripped non-empty values."""
-    return [k.strip() for k in s.split(",") if k.strip()]
+    """Split a comma-separated string into a tuple of stripped, interned non-empty values."""
+    return tuple(map(sys.intern, _TOKEN_RE.findall(s)))
 
+@cache
 def _bundle_root() -> Path:
     """Return the root path containing configuration and schema files.
 
     Detects whether the application is running as a frozen PyInstaller bundle or
-    as a normal Python module.
+    as a normal Python module. Resolved once per process.
 
     Returns:
         Path: The root directory where bundled resources reside.
@@ -43,39 +150,107 @@ def _bundle_root() -> Path:
         else Path(__file__).resolve().parents[1]
     )
 
-def _getint(section, key, cfg):
-    """Safely extract an integer value from a config section.
+def _getint(sec, key):
+    """Safely extract an integer value from a parsed config section.
 
     Args:
-        section: Section name in the ConfigParser.
+        sec: Section dict from the parsed INI (`{key: value}`).
         key: Option key name within that section.
-        cfg: ConfigParser object.
 
     Returns:
         int or None: The integer value if present and valid; otherwise None.
     """
+    if key not in sec:
+        return None
     try:
-        return cfg[section].getint(key)
-    except Exception:
+        return int(sec[key])
+    except ValueError:
         return None
 
 def _split_keys(cfg, section, option, default):
     """Split a comma-separated key list from configuration.
 
     Args:
-        cfg: ConfigParser object.
+        cfg: Parsed INI dict (`{section: {key: value}}`).
         section: Section name in the INI file.
         option: Key name within the section.
-        default: Default list of keys if not defined.
+        default: Default tuple of keys if not defined.
 
     Returns:
-        list[str]: Parsed list of key symbols or the provided default.
+        tuple[str, ...]: Parsed key symbols or the provided default.
     """
     if section in cfg and option in cfg[section]:
-        return [k.strip() for k in cfg[section][option].split(",") if k.strip()]
+        return _split_list(cfg[section][option])
     return default
 
+@dataclass(frozen=True, slots=True)
+class AppConfig:
+    """Immutable, normalized application configuration.
+
+    Fields keep the historical upper-case key names, and item access
+    (`cfg["DB_PATH"]`, `cfg.get("IMAGE")`, `"IMAGE" in cfg`) is supported so
+    existing call sites keep working. Nested mappings are read-only views,
+    which makes the memoized instance safe to share.
+    """
+    DB_PATH: str
+    IMAGE_ROOT: str
+    OUT_DIR: str
+    CSV_PATH: str
+    RESET_PATH: str
+    CACHE_DIR: str
+    STANDARD_VERSION: str
+    BATCH_SIZE: int
+    QC_RATE: float
+    KEYBINDS: MappingProxyType
+    RANDOM_SEED: int
+    IMAGE: MappingProxyType
+    RESULT_BINDINGS: MappingProxyType
+    MOUSE: MappingProxyType
+
+    def __getitem__(self, key: str):
+        if key not in self:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key) -> bool:
+        return key in self.__dataclass_fields__
+
+    def get(self, key: str, default=None):
+        """Return the field named `key`, or `default` if there is none."""
+        return getattr(self, key, default) if key in self else default
+
+@cache
+def _config_files():
+    """Return the candidate INI files in read order (later files override)."""
+    root = _bundle_root()
+    return (root / "config.example.ini", root / "config.ini")
+
 def load_config():
+    """Return the normalized configuration, reparsing only when the INI files change.
+
+    The result is memoized on the `(path, st_mtime_ns, st_size)` of each
+    existing candidate file, so repeated calls are a cache lookup until one of
+    the files is edited, added, or removed. The returned `AppConfig` is
+    frozen, so callers can share it freely.
+
+    Returns:
+        AppConfig: See `_load_config_uncached` for the structure.
+    """
+    key = []
+    for p in _config_files():
+        try:
+            st = p.stat()
+        except OSError:
+            continue
+        key.append((str(p), st.st_mtime_ns, st.st_size))
+    return _load_config_cached(tuple(key))
+
+@lru_cache(maxsize=4)
+def _load_config_cached(file_key):
+    """Memoized wrapper around `_load_config_uncached`."""
+    return _load_config_uncached(file_key)
+
+def _load_config_uncached(file_key):
     """Load and normalize configuration values from the INI files.
 
     Search order:
@@ -84,6 +259,10 @@ def load_config():
 
     The second file overrides the first if both exist.
 
+    Args:
+        file_key: `(path, st_mtime_ns, st_size)` of each existing INI file,
+            in override order.
+
     Sections handled:
       [paths]    — db_path, image_root, cache_dir
       [results]  — mapping of result labels to keys (preferred modern form)
@@ -94,7 +273,7 @@ def load_config():
       [mouse]    — left/right click behavior
 
     Returns:
-        dict: Normalized configuration object containing:
+        AppConfig: Normalized configuration object containing:
             {
               "DB_PATH": str,
               "IMAGE_ROOT": str,
@@ -102,59 +281,60 @@ def load_config():
               "STANDARD_VERSION": str,
               "BATCH_SIZE": int,
               "QC_RATE": float,
-              "KEYBINDS": {"yes": [...], "no": [...]},
+              "KEYBINDS": {"yes": (...), "no": (...)},
               "RANDOM_SEED": int,
               "IMAGE": dict,
-              "RESULT_BINDINGS": dict[str, list[str]],
+              "RESULT_BINDINGS": dict[str, tuple[str, ...]],
               "MOUSE": dict[str, {"action": str|None, "point": bool}],
             }
 
     Raises:
         RuntimeError: If no `[paths]` section is found.
-        ValueError: If the QC rate is outside [0.0, 1.0].
+        ValueError: If the QC rate is NaN or outside [0.0, 1.0].
     """
-    root = _bundle_root()
-    cfg = configparser.ConfigParser(interpolation=configparser.ExtendedInterpolation())
-
     # Look beside the EXE first
-    files = [root / "config.example.ini", root / "config.ini"]
-    cfg.read([str(p) for p in files if p.exists()])
+    cfg = _read_ini(file_key)
 
     if "paths" not in cfg:
         raise RuntimeError(
             "Missing config: Place a 'config.ini' next to the executable (you can copy 'config.example.ini')."
         )
 
-    expand = os.path.expandvars
+    expand = _expand
+    paths = cfg["paths"]
+    app = cfg.get("app", {})
+
+    yes_keys = _split_keys(cfg, "keybinds", "yes", ("y", "b", "s"))
+    no_keys = _split_keys(cfg, "keybinds", "no", ("n", "g"))
 
     # Parse dynamic result bindings
     result_bindings = {}
     if "results" in cfg:
         for result_name, keys in cfg["results"].items():
-            result_bindings[result_name.strip()] = _split_list(keys)
+            result_bindings[sys.intern(result_name.strip())] = _split_list(keys)
 
     # Back-compat fallback if [results] is not defined
     if not result_bindings:
-        yes_keys = _split_keys(cfg, "keybinds", "yes", ["y", "b", "s"])
-        no_keys = _split_keys(cfg, "keybinds", "no", ["n", "g"])
         result_bindings = {"yes": yes_keys, "no": no_keys}
 
     image = {}
-    if "image" in cfg:
+    image_sec = cfg.get("image")
+    if image_sec is not None:
         image = {
-            "crop_width": _getint("image", "crop_width", cfg),
-            "crop_height": _getint("image","crop_height", cfg),
-            "h_align": cfg["image"].get("h_align", "center").lower(),
-            "v_align": cfg["image"].get("v_align", "center").lower(),
-            "max_display_side": cfg["image"].getint("max_display_side", 1400),
+            "crop_width": _getint(image_sec, "crop_width"),
+            "crop_height": _getint(image_sec, "crop_height"),
+            "h_align": image_sec.get("h_align", "center").lower(),
+            "v_align": image_sec.get("v_align", "center").lower(),
+            "max_display_side": int(image_sec.get("max_display_side", 1400)),
         }
 
-    yes_keys = _split_keys(cfg, "keybinds", "yes", ["y","b","s"])
-    no_keys = _split_keys(cfg, "keybinds", "no", ["n","g"])
-    rs = cfg["review"].getint("random_seed", 42)
+    review = cfg.get("review", {})
+    rs = int(review.get("random_seed", 42))
 
-    qc_rate = float(cfg["review"].get("qc_rate","0.10")) if "review" in cfg else 0.10
-    if qc_rate < 0.0 or qc_rate > 1.0:
+    qc_raw = review.get("qc_rate")
+    qc_rate = 0.10 if qc_raw is None else float(qc_raw)
+    # NaN compares False both ways, so check finiteness explicitly
+    if not math.isfinite(qc_rate) or not (0.0 <= qc_rate <= 1.0):
         raise ValueError("QC rate must be between 0.0 and 1.0")
 
     mouse = {"left": {"action": None, "point": False},
@@ -162,25 +342,25 @@ def load_config():
     if "mouse" in cfg:
         for btn in ("left", "right"):
             if btn in cfg["mouse"]:
-                tokens = [t.strip().lower() for t in cfg["mouse"][btn].split(",") if t.strip()]
+                tokens = [sys.intern(t.lower()) for t in _split_list(cfg["mouse"][btn])]
                 # 'point' is a flag, anything else we treat as the result label
                 action = next((t for t in tokens if t != "point"), None)
                 point = "point" in tokens
                 mouse[btn] = {"action": action, "point": point}
 
-    return {
-        "DB_PATH": expand(cfg["paths"]["db_path"]),
-        "IMAGE_ROOT": expand(cfg["paths"]["image_root"]),
-        "OUT_DIR": expand(cfg["paths"]["out_dir"]),
-        "CSV_PATH": expand(cfg["paths"]["csv_path"]),
-        "RESET_PATH": expand(cfg["paths"]["reset"]),
-        "CACHE_DIR": expand(cfg["paths"]["cache_dir"]),
-        "STANDARD_VERSION": cfg["app"].get("standard_version", "v1.0"),
-        "BATCH_SIZE": cfg["app"].getint("batch_size", 20),
-        "QC_RATE": qc_rate,
-        "KEYBINDS": {"yes": yes_keys, "no": no_keys},
-        "RANDOM_SEED": rs,
-        "IMAGE": image,
-        "RESULT_BINDINGS": result_bindings,
-        "MOUSE": mouse,
-    }
+    return AppConfig(
+        DB_PATH=expand(paths["db_path"]),
+        IMAGE_ROOT=expand(paths["image_root"]),
+        OUT_DIR=expand(paths["out_dir"]),
+        CSV_PATH=expand(paths["csv_path"]),
+        RESET_PATH=expand(paths["reset"]),
+        CACHE_DIR=expand(paths["cache_dir"]),
+        STANDARD_VERSION=app.get("standard_version", "v1.0"),
+        BATCH_SIZE=int(app.get("batch_size", 20)),
+        QC_RATE=qc_rate,
+        KEYBINDS=MappingProxyType({"yes": yes_keys, "no": no_keys}),
+        RANDOM_SEED=rs,
+        IMAGE=MappingProxyType(image),
+        RESULT_BINDINGS=MappingProxyType(result_bindings),
+        MOUSE=MappingProxyType({btn: MappingProxyType(m) for btn, m in mouse.items()}),
+    )
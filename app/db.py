@@ -10,7 +10,10 @@ Responsibilities:
   * Initialize or upgrade the schema (`ensure_schema`, `run_migrations`).
   * Handle batch assignment (`assign_batch`) and decision recording.
   * Manage review rollback (`release_batch`) when a session is canceled.
-  * Persist user click annotations (`add_annotation`).
+  * Buffer and persist user click annotations (`add_annotation`,
+    `flush_annotations`).
+  * Optionally run all of the above on a background `Writer` thread that
+    groups queued mutations into shared transactions.
 
 SQLite settings:
   * `isolation_level=None` → autocommit mode.
@@ -21,7 +24,211 @@ All mutations are wrapped in short explicit transactions to avoid race
 conditions during multi-user access.
 """
 
-import sqlite3, uuid, os
+import queue, random, sqlite3, threading, time, uuid, os
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from dataclasses import dataclass, field
+
+# ---------------------------------------------------------------------------
+# Statement templates
+# ---------------------------------------------------------------------------
+# Hot-path SQL lives in module-level constants so every call hands sqlite3 the
+# same string and hits its per-connection statement cache instead of
+# re-preparing the statement.
+
+_SQL_ASSIGN_BATCH = """
+WITH qc_pool AS MATERIALIZED (
+  -- 1) QC pool
+  SELECT r.review_id, r.image_id
+  FROM reviews r INDEXED BY idx_reviews_unassigned_pick
+  JOIN images i ON i.image_id = r.image_id
+  WHERE r.status='unassigned'
+    AND i.qc_flag=1
+    -- AND i.variant = '000'
+    -- don't give both QC rows of the same image to the same user
+    AND NOT EXISTS (
+      SELECT 1 FROM reviews r2
+      WHERE r2.image_id = r.image_id AND r2.assigned_to = :user
+    )
+  ORDER BY r.pick_key  -- variant-major, random within variant; index-ordered
+  LIMIT :target_qc
+),
+qc_short AS MATERIALIZED (
+  SELECT MAX(0, :target_qc - COUNT(*)) AS n FROM qc_pool
+),
+non_pool AS MATERIALIZED (
+  -- 2) Non-QC pool (and also any QC leftovers if not enough QC available)
+  SELECT r.review_id
+  FROM reviews r INDEXED BY idx_reviews_unassigned_pick
+  JOIN images i ON i.image_id = r.image_id
+  WHERE r.status='unassigned'
+    -- AND i.variant = '000'
+    AND (
+          i.qc_flag=0
+       OR (SELECT n FROM qc_short) > 0  -- allow topping up with QC if we couldn't get enough
+    )
+    AND r.image_id NOT IN (SELECT image_id FROM qc_pool)
+    AND NOT EXISTS (
+      SELECT 1 FROM reviews r2
+      WHERE r2.image_id = r.image_id AND r2.assigned_to = :user
+    )
+  ORDER BY r.pick_key  -- variant-major, random within variant; index-ordered
+  LIMIT :target_non + (SELECT n FROM qc_short)
+)
+UPDATE reviews
+SET status='in_progress', assigned_to=:user, batch_id=:batch_id
+WHERE review_id IN (
+  SELECT review_id FROM qc_pool
+  UNION ALL
+  SELECT review_id FROM non_pool
+)
+RETURNING
+  review_id,
+  image_id,
+  (SELECT path FROM images WHERE image_id = reviews.image_id),
+  (SELECT device_id FROM images WHERE image_id = reviews.image_id),
+  (SELECT qc_flag FROM images WHERE image_id = reviews.image_id),
+  (SELECT variant FROM images WHERE image_id = reviews.image_id);
+"""
+
+_SQL_RELEASE_BATCH = """
+UPDATE reviews
+SET status='unassigned', assigned_to=NULL, batch_id=NULL
+WHERE batch_id=? AND assigned_to=? AND status='in_progress';
+"""
+
+_SQL_RECORD_DECISION = """
+UPDATE reviews
+SET status='done', result=?, decided_at=?, standard_version=?
+WHERE review_id=? AND assigned_to=? AND batch_id=?;
+"""
+
+_SQL_ADD_ANNOTATION = """
+INSERT INTO annotations(review_id, x_norm, y_norm, button, created_at)
+VALUES (?, ?, ?, ?, ?);
+"""
+
+_SQL_DEVICE_REVIEW_RESULTS = """
+SELECT i.variant, r.result
+FROM reviews r
+JOIN images i ON i.image_id = r.image_id
+WHERE i.device_id = ?
+  AND r.status = 'done'
+  AND r.result IS NOT NULL
+ORDER BY i.variant ASC, r.review_id ASC;
+"""
+
+_SQL_AUTO_SKIP_DEVICE = """
+UPDATE reviews AS r
+SET status = 'done',
+    result = ?,
+    decided_at = ?,
+    standard_version = COALESCE(r.standard_version, ?),
+    assigned_to = COALESCE(r.assigned_to, ?),
+    batch_id = COALESCE(r.batch_id, ?)
+FROM images i
+WHERE i.image_id = r.image_id
+  AND i.device_id = ?
+  AND r.status != 'done';
+"""
+
+_SQL_UPDATE_DEVICE_FINAL = """
+UPDATE devices
+SET final_result = ?,
+    final_decision_source_image_id = ?,
+    decided_at = ?,
+    notes = COALESCE(notes, ?)
+WHERE device_id = ?;
+"""
+
+_SQL_FETCH_PAIR_REVIEW = """
+SELECT r.review_id, i.image_id, i.path, i.device_id, i.qc_flag
+FROM images i0
+JOIN images i ON i.image_id = i0.pair_image_id
+JOIN reviews r ON r.image_id = i.image_id
+WHERE i0.path=? AND r.status!='done'
+ORDER BY r.rowid ASC
+LIMIT 1
+"""
+
+# Subquery: the first unfinished review of the `001` image paired with :path
+_PAIR_PICK = """
+  SELECT r.review_id
+  FROM images i0
+  JOIN reviews r ON r.image_id = i0.pair_image_id
+  WHERE i0.path = :path AND r.status != 'done'
+  ORDER BY r.rowid ASC
+  LIMIT 1
+"""
+
+_SQL_AUTO_SKIP_PAIR = f"""
+UPDATE reviews
+SET status='done',
+    result='skip',
+    decided_at=:now,
+    standard_version=:standard_version,
+    assigned_to=:user,
+    batch_id=:batch_id
+WHERE review_id = ({_PAIR_PICK});
+"""
+
+_SQL_ASSIGN_PAIR = f"""
+UPDATE reviews
+SET status='in_progress', assigned_to=:user, batch_id=:batch_id
+WHERE review_id = ({_PAIR_PICK})
+RETURNING
+  review_id,
+  image_id,
+  (SELECT path FROM images WHERE image_id = reviews.image_id),
+  (SELECT device_id FROM images WHERE image_id = reviews.image_id),
+  (SELECT qc_flag FROM images WHERE image_id = reviews.image_id);
+"""
+
+
+_batch_ids = deque()
+
+def _new_batch_id() -> str:
+    """Return a fresh UUID4 string for a batch.
+
+    Random bytes are drawn from the OS 64 UUIDs at a time, so most batches do
+    not pay for a `urandom` call. `deque.popleft` is atomic, so concurrent
+    callers never share an id.
+    """
+    while True:
+        try:
+            return _batch_ids.popleft()
+        except IndexError:
+            raw = os.urandom(16 * 64)
+            _batch_ids.extend(
+                str(uuid.UUID(bytes=raw[i:i + 16], version=4)) for i in range(0, len(raw), 16)
+            )
+
+def _now_iso() -> str:
+    """Return the current UTC time in SQLite's `datetime('now')` format."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+@contextmanager
+def _txn(con):
+    """Run the block in a `BEGIN IMMEDIATE` transaction, or join the open one.
+
+    Mutations that span several statements use this instead of `with con:` so
+    they can also run inside a caller's transaction (e.g. a `Writer` batch)
+    without committing it early.
+    """
+    if con.in_transaction:
+        yield
+        return
+    con.execute("BEGIN IMMEDIATE;")
+    try:
+        yield
+        # a failed COMMIT (e.g. SQLITE_BUSY) must not leave the transaction open
+        con.commit()
+    except BaseException:
+        con.rollback()
+        _unwrite_annotations()
+        raise
+    _annotation_buffer.written.clear()
 
 # ---------------------------------------------------------------------------
 # Schema migration helpers
@@ -40,11 +247,49 @@ def _set_user_version(con, v: int):
 # Core connection and schema utilities
 # ---------------------------------------------------------------------------
 
+# Applied to every connection in one executescript call. Throughput tuning:
+# NORMAL is crash-safe under WAL (only the last commits can roll back on power
+# loss), and the larger cache / in-memory temp storage keeps the
+# batch-assignment sorts off disk.
+_PRAGMAS_NETWORK = """
+PRAGMA journal_mode=WAL;
+PRAGMA foreign_keys=ON;
+PRAGMA synchronous=NORMAL;
+PRAGMA wal_autocheckpoint=1000;
+PRAGMA cache_size=-65536;  -- 64 MiB
+PRAGMA temp_store=MEMORY;
+"""
+_PRAGMAS_LOCAL = _PRAGMAS_NETWORK + "PRAGMA mmap_size=268435456;  -- 256 MiB\n"
+
+_known_dirs = set()
+
+# GetDriveTypeW results that are known to be local disks (fixed, removable,
+# CD-ROM, RAM disk); remote and unknown drives are treated as network
+_LOCAL_DRIVE_TYPES = (2, 3, 5, 6)
+
+def _is_network_path(db_path: str) -> bool:
+    """Return True unless `db_path` is known to be on a local disk.
+
+    UNC paths (`\\\\server\\share` or `//server/share`) are always network
+    paths. On Windows the drive letter is also checked with `GetDriveTypeW`,
+    so a share mapped to e.g. `Z:` counts as network too.
+    """
+    if db_path[:2] in ("\\\\", "//"):
+        return True
+    if os.name != "nt":
+        return False
+    import ctypes
+    drive = os.path.splitdrive(os.path.abspath(db_path))[0]
+    if not drive or drive[:2] in ("\\\\", "//"):
+        return bool(drive)
+    return ctypes.windll.kernel32.GetDriveTypeW(drive + "\\") not in _LOCAL_DRIVE_TYPES
+
 def connect(db_path: str):
     """Open a SQLite connection with standard PRAGMA settings.
 
-    Ensures parent directories exist before opening, and configures WAL and
-    foreign-key enforcement. Connection is autocommit by default.
+    Ensures parent directories exist before opening, and configures WAL,
+    foreign-key enforcement, and throughput-oriented cache/sync settings.
+    Connection is autocommit by default.
 
     Args:
         db_path: Absolute or relative path to the SQLite database file.
@@ -55,13 +300,18 @@ def connect(db_path: str):
     Raises:
         RuntimeError: If SQLite cannot open the database.
     """
-    # Ensure the parent directory exists (SQLite won't create folders)
+    # Ensure the parent directory exists (SQLite won't create folders); each
+    # directory is checked once per process, saving a stat per pooled open
     parent = os.path.dirname(db_path)
-    if parent and not os.path.isdir(parent):
-        os.makedirs(parent, exist_ok=True)
+    if parent and parent not in _known_dirs:
+        if not os.path.isdir(parent):
+            os.makedirs(parent, exist_ok=True)
+        _known_dirs.add(parent)
 
     try:
-        con = sqlite3.connect(db_path, timeout=15, isolation_level=None)
+        con = sqlite3.connect(
+            db_path, timeout=15, isolation_level=None, cached_statements=256
+        )
     except sqlite3.OperationalError as e:
         raise RuntimeError(
             f"SQLite failed to open: {db_path}\n"
@@ -70,20 +320,264 @@ def connect(db_path: str):
             f"Original error: {e}"
         ) from e
 
-    con.execute("PRAGMA journal_mode=WAL;")
-    con.execute("PRAGMA foreign_keys=ON;")
+    # Memory-mapped reads only for local files: over SMB another client's
+    # writes can leave stale mapped pages, so shares keep plain read() I/O
+    con.executescript(
+        _PRAGMAS_NETWORK if _is_network_path(db_path) else _PRAGMAS_LOCAL
+    )
     return con
 
 
+def _columns(con, table: str) -> set[str]:
+    """Return the column names of `table` (empty if the table does not exist)."""
+    return {row[1] for row in con.execute(f"PRAGMA table_info({table});")}
+
+def _migrate_v3_pick_key(con):
+    """v3 — add `reviews.pick_key` and backfill it for existing rows."""
+    cols = _columns(con, "reviews")
+    if not cols or "pick_key" in cols:
+        return
+    con.execute("ALTER TABLE reviews ADD COLUMN pick_key INTEGER;")
+    con.execute(
+        """
+        UPDATE reviews
+        SET pick_key = (
+            SELECT CAST(i.variant AS INTEGER) * 4294967296
+            FROM images i WHERE i.image_id = reviews.image_id
+        ) + (random() & 4294967295)
+        WHERE pick_key IS NULL;
+        """
+    )
+
+def _migrate_v4_pair_image_id(con):
+    """v4 — add `images.pair_image_id` linking each `000` image to its `001`."""
+    cols = _columns(con, "images")
+    if not cols or "pair_image_id" in cols:
+        return
+    con.execute(
+        "ALTER TABLE images ADD COLUMN pair_image_id INTEGER REFERENCES images(image_id);"
+    )
+    con.execute(
+        """
+        UPDATE images
+        SET pair_image_id = (
+            SELECT p.image_id FROM images p
+            WHERE p.device_id = images.device_id AND p.variant = '001'
+        )
+        WHERE variant = '000';
+        """
+    )
+
+def _migrate_v5_partial_assignee_index(con):
+    """v5 — drop the full `idx_reviews_image_assignee`; schema.sql recreates it partial."""
+    con.execute("DROP INDEX IF EXISTS idx_reviews_image_assignee;")
+
+def _migrate_v6_done_decided_index(con):
+    """v6 — nothing to alter; bumping the version lets schema.sql add
+    `idx_reviews_done_decided` to existing databases."""
+
+def _migrate_v7_annotations_review_index(con):
+    """v7 — nothing to alter; schema.sql adds `idx_annotations_review`."""
+
+def _migrate_v8_drop_redundant_device_indexes(con):
+    """v8 — drop `idx_images_device` and `idx_images_device_variant`, both
+    prefixes of the UNIQUE (device_id, variant) index."""
+    con.execute("DROP INDEX IF EXISTS idx_images_device;")
+    con.execute("DROP INDEX IF EXISTS idx_images_device_variant;")
+
+# (version, step) in ascending order; each step upgrades from version - 1.
+# Steps are no-ops on a fresh database (tables not created yet).
+_MIGRATIONS = [
+    (3, _migrate_v3_pick_key),
+    (4, _migrate_v4_pair_image_id),
+    (5, _migrate_v5_partial_assignee_index),
+    (6, _migrate_v6_done_decided_index),
+    (7, _migrate_v7_annotations_review_index),
+    (8, _migrate_v8_drop_redundant_device_indexes),
+]
+SCHEMA_VERSION = _MIGRATIONS[-1][0]
+
+def run_migrations(con, from_version: int | None = None):
+    """Apply the migration steps newer than `from_version`.
+
+    Each step runs in its own `BEGIN IMMEDIATE` transaction.
+
+    Args:
+        con: SQLite connection.
+        from_version: Current schema version; defaults to `PRAGMA user_version`.
+    """
+    if from_version is None:
+        from_version = _get_user_version(con)
+    for version, step in _MIGRATIONS:
+        if version > from_version:
+            with _txn(con):
+                step(con)
+
 def ensure_schema(con, schema_path: str):
-    """Create all tables if they don't exist using the provided schema.
+    """Create or upgrade the schema to `SCHEMA_VERSION`.
+
+    If `PRAGMA user_version` is already current this is a single PRAGMA read:
+    `schema.sql` is neither read nor parsed. Otherwise the pending migration
+    steps run first (so indexes in the schema can refer to columns added after
+    the original release), then `schema.sql` is applied and the version bumped.
 
     Args:
         con: SQLite connection.
         schema_path: Path to `schema.sql`.
     """
+    version = _get_user_version(con)
+    if version >= SCHEMA_VERSION:
+        return
+    if version == 0 and not con.execute("SELECT 1 FROM sqlite_master LIMIT 1;").fetchone():
+        # Brand-new file: auto_vacuum can only change before tables exist (and
+        # under WAL only via VACUUM, which is instant on an empty database)
+        con.execute("PRAGMA auto_vacuum=INCREMENTAL;")
+        con.execute("VACUUM;")
+    run_migrations(con, version)
     with open(schema_path, "r", encoding="utf-8") as f:
         con.executescript(f.read())
+    _set_user_version(con, SCHEMA_VERSION)
+    # Refresh planner statistics where new indexes or data make it worthwhile
+    con.execute("PRAGMA optimize;")
+
+
+def housekeeping(con):
+    """Return free pages to the filesystem and checkpoint the WAL, if idle.
+
+    Meant for quiet moments such as session end. `incremental_vacuum` only
+    does work on databases created with `auto_vacuum=INCREMENTAL` (see
+    `ensure_schema`), and the PASSIVE checkpoint never waits on other users'
+    readers or writers. The vacuum needs the write lock, so the busy timeout
+    is set to 0 for the call: if another user is writing, this raises
+    `sqlite3.OperationalError` at once instead of waiting out `connect`'s 15 s.
+    """
+    (timeout_ms,) = con.execute("PRAGMA busy_timeout;").fetchone()
+    con.execute("PRAGMA busy_timeout=0;")
+    try:
+        con.execute("PRAGMA incremental_vacuum(1000);").fetchall()
+        con.execute("PRAGMA wal_checkpoint(PASSIVE);").fetchall()
+    finally:
+        con.execute(f"PRAGMA busy_timeout={int(timeout_ms)};")
+
+
+class Writer:
+    """Background thread that owns the write connection and batches mutations.
+
+    `submit(fn, *args)` queues a call `fn(con, *args)` and returns at once.
+    The thread takes the first queued op, keeps draining for up to `max_wait`
+    seconds or `max_ops` ops, and runs them all in one `BEGIN IMMEDIATE`
+    transaction, so a burst of clicks and decisions costs one commit. Ops are
+    applied in submission order; each runs under its own SAVEPOINT, so a
+    failing op is rolled back alone and its exception is reported by the next
+    `flush()`.
+
+    Module functions that take a `con` as their first argument (e.g.
+    `record_decision`, `add_annotation`, `finalize_device_yes`) can be
+    submitted directly.
+    """
+
+    def __init__(self, db_path: str, max_ops: int = 64, max_wait: float = 0.005):
+        self.db_path = db_path
+        self.max_ops = max_ops
+        self.max_wait = max_wait
+        self._q = queue.SimpleQueue()
+        self._errors = []
+        self._ready = threading.Event()
+        self._open_error = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._open_error is not None:
+            raise self._open_error
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue `fn(con, *args, **kwargs)` to run on the writer thread."""
+        self._q.put((fn, args, kwargs))
+
+    def flush(self):
+        """Block until every op submitted so far is committed.
+
+        Returns:
+            list[Exception]: Errors raised by ops since the previous flush.
+
+        Raises:
+            RuntimeError: If the writer thread has stopped, so the queued ops
+                will never run.
+        """
+        done = threading.Event()
+        self._q.put(done)
+        while not done.wait(0.5):
+            if not self._thread.is_alive():
+                raise RuntimeError("Database writer thread has stopped; queued changes were not saved")
+        errors, self._errors = self._errors, []
+        return errors
+
+    def close(self):
+        """Flush pending ops, stop the thread, and close its connection.
+
+        Safe to call more than once.
+
+        Returns:
+            list[Exception]: Errors raised by ops since the previous flush.
+
+        Raises:
+            RuntimeError: If the writer thread stopped before it was closed.
+        """
+        if self._closed:
+            return []
+        self._closed = True
+        errors = self.flush()
+        self._q.put(None)
+        self._thread.join()
+        return errors
+
+    def _run(self):
+        try:
+            con = connect(self.db_path)
+        except Exception as e:
+            self._open_error = e
+            self._ready.set()
+            return
+        self._ready.set()
+        stop = False
+        while not stop:
+            batch = [self._q.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_ops and batch[-1] is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                stop = True
+                batch.pop()
+            ops = [op for op in batch if isinstance(op, tuple)]
+            if ops:
+                try:
+                    with _txn(con):
+                        for fn, args, kwargs in ops:
+                            con.execute("SAVEPOINT op;")
+                            mark = len(_annotation_buffer.written)
+                            try:
+                                fn(con, *args, **kwargs)
+                            except Exception as e:
+                                con.execute("ROLLBACK TO op;")
+                                _unwrite_annotations(mark)
+                                self._errors.append(e)
+                            con.execute("RELEASE op;")
+                except Exception as e:
+                    self._errors.append(e)
+                # clicks dropped by _write_annotations
+                self._errors.extend(_annotation_buffer.errors)
+                _annotation_buffer.errors.clear()
+            for op in batch:
+                if isinstance(op, threading.Event):
+                    op.set()
+        con.close()
 
 # ---------------------------------------------------------------------------
 # Review workflow management
@@ -93,7 +587,9 @@ def assign_batch(con, user: str, n: int, qc_rate: float = 0.10):
     """Assign a new batch of reviews to a user.
 
     Selects up to `n` unassigned review rows, balancing QC and non-QC items
-    based on `qc_rate`, and marks them as `in_progress` for this user.
+    based on `qc_rate`, and marks them as `in_progress` for this user. The
+    pick, the update, and the image lookup happen in a single statement, so
+    the write lock is held for one round-trip only.
 
     Args:
         con: SQLite connection.
@@ -106,111 +602,39 @@ def assign_batch(con, user: str, n: int, qc_rate: float = 0.10):
             (batch_id, items)
             batch_id — UUID identifying this batch
             items — [(review_id, image_id, path, device_id, qc_flag), ...]
+                    ordered by variant, random within a variant
     """
-    batch_id = str(uuid.uuid4())
+    batch_id = _new_batch_id()
     target_qc = max(1, round(n * qc_rate))
     target_non = n - target_qc
 
-    with con:
-        con.execute("BEGIN IMMEDIATE;")
-
-        # 1) QC pool
-        qc_rows = con.execute(
-            """
-            WITH pool AS (
-              SELECT r.review_id
-              FROM reviews r
-              JOIN images i ON i.image_id = r.image_id
-              WHERE r.status='unassigned'
-                AND i.qc_flag=1
-                -- AND i.variant = '000'
-                -- don't give both QC rows of the same image to the same user
-                AND NOT EXISTS (
-                  SELECT 1 FROM reviews r2
-                  WHERE r2.image_id = r.image_id AND r2.assigned_to = ?
-                )
-              ORDER BY i.variant ASC, RANDOM()
-              LIMIT ?
-            )
-            UPDATE reviews
-            SET status='in_progress', assigned_to=?, batch_id=?
-            WHERE review_id IN (SELECT review_id FROM pool)
-            RETURNING review_id;
-            """,
-            (user, target_qc, user, batch_id),
-        ).fetchall()
-
-        got_qc = len(qc_rows)
+    rows = con.execute(
+        _SQL_ASSIGN_BATCH,
+        {"user": user, "target_qc": target_qc, "target_non": target_non, "batch_id": batch_id},
+    ).fetchall()
 
-        # 2) Non-QC pool (and also any QC leftovers if not enough QC available)
-        non_rows = con.execute(
-            """
-            WITH pool AS (
-              SELECT r.review_id
-              FROM reviews r
-              JOIN images i ON i.image_id = r.image_id
-              WHERE r.status='unassigned'
-                -- AND i.variant = '000'
-                AND (
-                      i.qc_flag=0
-                   OR ? > 0  -- allow topping up with QC if we couldn't get enough
-                )
-                AND NOT EXISTS (
-                  SELECT 1 FROM reviews r2
-                  WHERE r2.image_id = r.image_id AND r2.assigned_to = ?
-                )
-              ORDER BY i.variant ASC, RANDOM()
-              LIMIT ?
-            )
-            UPDATE reviews
-            SET status='in_progress', assigned_to=?, batch_id=?
-            WHERE review_id IN (SELECT review_id FROM pool)
-            RETURNING review_id;
-            """,
-            (
-                target_qc - got_qc,
-                user,
-                target_non + max(0, target_qc - got_qc),
-                user,
-                batch_id,
-            ),
-        ).fetchall()
-
-        con.execute("COMMIT;")
-
-    # Fetch the images for the picked review_ids
-    picked_ids = [r[0] for r in qc_rows] + [r[0] for r in non_rows]
-    if not picked_ids:
-        return batch_id, []
-
-    q = f"""
-      SELECT r.review_id, i.image_id, i.path, i.device_id, i.qc_flag
-      FROM reviews r JOIN images i ON i.image_id = r.image_id
-      WHERE r.review_id IN ({",".join("?" * len(picked_ids))})
-      ORDER BY i.variant, RANDOM()
-        """
-    items = con.execute(q, picked_ids).fetchall()
+    # RETURNING order is unspecified: shuffle, then stable-sort by variant
+    random.shuffle(rows)
+    rows.sort(key=lambda r: r[5])
     # return [(review_id, image_id, path, device_id, qc_flag), ...]
-    return batch_id, items
+    return batch_id, [r[:5] for r in rows]
 
 def release_batch(con, user: str, batch_id: str):
     """Release any 'in_progress' reviews for this batch back to the pool.
 
     Used when a reviewer exits early (e.g., presses Esc) to ensure their
-    uncompleted items are not locked indefinitely.
+    uncompleted items are not locked indefinitely. Buffered annotations are
+    written first, in the same transaction, so clicks are never dropped.
 
     Args:
         con: SQLite connection.
         user: Username releasing the batch.
         batch_id: The batch UUID currently in progress.
     """
-    with con:
+    with _txn(con):
+        _write_annotations(con)
         con.execute(
-            """
-            UPDATE reviews
-            SET status='unassigned', assigned_to=NULL, batch_id=NULL
-            WHERE batch_id=? AND assigned_to=? AND status='in_progress';
-            """,
+            _SQL_RELEASE_BATCH,
             (batch_id, user),
         )
 
@@ -219,6 +643,9 @@ def record_decision(
 ):
     """Mark a review as completed and record the decision.
 
+    Any buffered annotations are written in the same transaction, so a click
+    and the decision it triggers cost a single commit.
+
     Args:
         con: SQLite connection.
         review_id: ID of the review to finalize.
@@ -227,36 +654,126 @@ def record_decision(
         result: Decision label (e.g., 'yes', 'no', 'skip').
         standard_version: Current app or evaluation standard version.
     """
-    with con:
+    with _txn(con):
+        _write_annotations(con)
         con.execute(
-            """
-            UPDATE reviews
-            SET status='done', result=?, decided_at=datetime('now'), standard_version=?
-            WHERE review_id=? AND assigned_to=? AND batch_id=?;
-            """,
-            (result, standard_version, review_id, user, batch_id),
+            _SQL_RECORD_DECISION,
+            (result, _now_iso(), standard_version, review_id, user, batch_id),
         )
 
+# ---------------------------------------------------------------------------
+# Annotation buffering
+# ---------------------------------------------------------------------------
+
+@dataclass
+class AnnotationBuffer:
+    """Clicks waiting to be written to the `annotations` table.
+
+    Rows are flushed with the next decision or batch release, explicitly via
+    `flush_annotations`, or when a click arrives and either `max_rows` have
+    accumulated or the oldest row is older than `max_age` seconds (the age
+    is only checked on that next click; there is no timer).
+
+    Written rows move to `written` until their transaction commits, and go
+    back to `rows` if it rolls back. A row the database rejects (e.g. a
+    review that no longer exists) is dropped and its error kept in `errors`,
+    which the `Writer` reports on its next `flush()`.
+    """
+    rows: list = field(default_factory=list)
+    written: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+    max_rows: int = 32
+    max_age: float = 0.25
+    first_at: float = 0.0
+
+_annotation_buffer = AnnotationBuffer()
+
+def _write_annotations(con):
+    """Insert buffered annotations; caller owns the transaction.
+
+    The rows are kept in `written` until `_txn` commits, so a rollback
+    (of the transaction or a `Writer` op savepoint) puts them back. Rows
+    that violate a constraint are dropped (see `AnnotationBuffer.errors`)
+    rather than failing the caller, so a bad click never rolls back the
+    decision it is written with.
+    """
+    buf = _annotation_buffer
+    if not buf.rows:
+        return
+    rows, buf.rows = buf.rows, []
+    con.execute("SAVEPOINT annotations;")
+    try:
+        try:
+            con.executemany(_SQL_ADD_ANNOTATION, rows)
+        except sqlite3.IntegrityError:
+            # find the offending rows; a failed INSERT leaves no partial row
+            con.execute("ROLLBACK TO annotations;")
+            good = []
+            for row in rows:
+                try:
+                    con.execute(_SQL_ADD_ANNOTATION, row)
+                    good.append(row)
+                except sqlite3.IntegrityError as e:
+                    buf.errors.append(e)
+            rows = good
+        con.execute("RELEASE annotations;")
+    except BaseException:
+        buf.rows[:0] = rows
+        raise
+    buf.written.extend(rows)
+
+def _unwrite_annotations(mark: int = 0):
+    """Return rows written since `written[mark]` to the buffer after a rollback."""
+    buf = _annotation_buffer
+    if len(buf.written) > mark:
+        buf.rows[:0] = buf.written[mark:]
+        del buf.written[mark:]
+
+def flush_annotations(con):
+    """Write all buffered annotations in one transaction.
+
+    Call before closing the connection or releasing a batch so no clicks are
+    lost.
+
+    Args:
+        con: SQLite connection.
+    """
+    if not _annotation_buffer.rows:
+        return
+    with _txn(con):
+        _write_annotations(con)
+
 def add_annotation(con, review_id: int, x_norm: float, y_norm: float, button: str):
-    """Insert a spatial annotation (click) for a review.
+    """Buffer a spatial annotation (click) for a review.
 
     Each record represents one user click, stored with normalized coordinates.
+    The row is written on the next `record_decision`/`release_batch`/
+    `flush_annotations`, or with this call once the buffer reaches its size
+    threshold or its oldest row has passed the age threshold (age is only
+    checked here, when a click arrives).
 
     Args:
         con: SQLite connection.
         review_id: ID of the review associated with the click.
-        x_norm: Horizontal position in normalized [0,1] image space.
-        y_norm: Vertical position in normalized [0,1] image space.
+        x_norm: Horizontal position in normalized [0,1] image space (float).
+        y_norm: Vertical position in normalized [0,1] image space (float).
         button: 'left' or 'right' — the mouse button clicked.
+
+    Raises:
+        ValueError: If `button` or a coordinate would violate the
+            `annotations` table's constraints.
     """
-    with con:
-        con.execute(
-            """
-            INSERT INTO annotations(review_id, x_norm, y_norm, button, created_at)
-            VALUES (?, ?, ?, ?, datetime('now'));
-            """,
-            (review_id, float(x_norm), float(y_norm), button),
-        )
+    if button not in ("left", "right"):
+        raise ValueError(f"Invalid annotation button: {button!r}")
+    if x_norm is None or y_norm is None:
+        raise ValueError("Annotation coordinates must not be None")
+    buf = _annotation_buffer
+    now = time.monotonic()
+    if not buf.rows:
+        buf.first_at = now
+    buf.rows.append((review_id, x_norm, y_norm, button, _now_iso()))
+    if len(buf.rows) >= buf.max_rows or now - buf.first_at >= buf.max_age:
+        flush_annotations(con)
 
 def get_device_review_results(con, device_id: str):
     """Return completed review results for a device, ordered by variant.
@@ -265,17 +782,13 @@ def get_device_review_results(con, device_id: str):
     status='done' and result is not NULL, ordered by images.variant ASC.
 
     This is used by the NO–SKIP–SKIP pattern logic.
+
+    Args:
+        con: SQLite connection.
+        device_id: Device whose history to fetch.
     """
     rows = con.execute(
-        """
-        SELECT i.variant, r.result
-        FROM reviews r
-        JOIN images i ON i.image_id = r.image_id
-        WHERE i.device_id = ?
-          AND r.status = 'done'
-          AND r.result IS NOT NULL
-        ORDER BY i.variant ASC, r.review_id ASC;
-        """,
+        _SQL_DEVICE_REVIEW_RESULTS,
         (device_id,),
     ).fetchall()
     return rows  # e.g. [('000', 'no'), ('001', 'skip'), ('002', 'skip')]
@@ -294,23 +807,10 @@ def auto_skip_remaining_for_device(
       * YES rule:     result_code = 'auto_skip_device_yes'
       * NO–SKIP–SKIP: result_code = 'repeated_skip_pattern'
     """
-    with con:
-        con.execute(
-            """
-            UPDATE reviews
-            SET status = 'done',
-                result = ?,
-                decided_at = datetime('now'),
-                standard_version = COALESCE(standard_version, ?),
-                assigned_to = COALESCE(assigned_to, ?),
-                batch_id = COALESCE(batch_id, ?)
-            WHERE image_id IN (
-                SELECT image_id FROM images WHERE device_id = ?
-            )
-              AND status != 'done';
-            """,
-            (result_code, standard_version, user, batch_id, device_id),
-        )
+    con.execute(
+        _SQL_AUTO_SKIP_DEVICE,
+        (result_code, _now_iso(), standard_version, user, batch_id, device_id),
+    )
 
 def update_device_final_result(
     con,
@@ -324,17 +824,37 @@ def update_device_final_result(
     final_result: 'yes', 'no', or 'unknown'
     decision_source: image_id or rule name (e.g. 'no_skip_skip_rule')
     """
-    with con:
+    con.execute(
+        _SQL_UPDATE_DEVICE_FINAL,
+        (final_result, decision_source, _now_iso(), notes, device_id),
+    )
+
+def _finalize_device(
+    con,
+    device_id: str,
+    user: str,
+    batch_id: str | None,
+    standard_version: str,
+    result_code: str,
+    final_result: str,
+    decision_source: str,
+    notes: str,
+):
+    """Auto-skip a device's remaining reviews and set its final result atomically.
+
+    Both updates share one `BEGIN IMMEDIATE` transaction (one commit, one
+    write-lock acquisition), so the reviews can never be skipped without the
+    device row being updated.
+    """
+    now = _now_iso()
+    with _txn(con):
         con.execute(
-            """
-            UPDATE devices
-            SET final_result = ?,
-                final_decision_source_image_id = ?,
-                decided_at = datetime('now'),
-                notes = COALESCE(notes, ?)
-            WHERE device_id = ?;
-            """,
-            (final_result, decision_source, notes, device_id),
+            _SQL_AUTO_SKIP_DEVICE,
+            (result_code, now, standard_version, user, batch_id, device_id),
+        )
+        con.execute(
+            _SQL_UPDATE_DEVICE_FINAL,
+            (final_result, decision_source, now, notes, device_id),
         )
 
 def finalize_device_yes(
@@ -346,17 +866,13 @@ def finalize_device_yes(
     standard_version: str,
 ):
     """Apply YES rule: mark device yes and auto-skip remaining images."""
-    auto_skip_remaining_for_device(
+    _finalize_device(
         con,
         device_id=device_id,
         user=user,
         batch_id=batch_id,
         standard_version=standard_version,
         result_code="auto_skip_device_yes",
-    )
-    update_device_final_result(
-        con,
-        device_id=device_id,
         final_result="yes",
         decision_source=str(image_id),
         notes="yes_decision",
@@ -370,17 +886,13 @@ def finalize_device_no_by_pattern(
     standard_version: str,
 ):
     """Apply NO–SKIP–SKIP rule: mark device no and auto-skip remaining images."""
-    auto_skip_remaining_for_device(
+    _finalize_device(
         con,
         device_id=device_id,
         user=user,
         batch_id=batch_id,
         standard_version=standard_version,
         result_code="repeated_skip_pattern",
-    )
-    update_device_final_result(
-        con,
-        device_id=device_id,
         final_result="no",
         decision_source="repeated_skip_rule",
         notes="repeated_skip_pattern",
@@ -394,14 +906,15 @@ def finalize_exhausted_devices(con):
       with final_decision_source='exhausted_images'.
     """
 
-    with con:
+    now = _now_iso()
+    with _txn(con):
         # 1) Any device that has at least one 'yes' but hasn't been finalized as 'yes'
         con.execute(
             """
             UPDATE devices AS d
             SET final_result = 'yes',
                 final_decision_source_image_id = 'cleanup_yes',
-                decided_at = datetime('now'),
+                decided_at = ?,
                 notes = COALESCE(notes, 'cleanup_yes')
             WHERE (d.final_result IS NULL OR d.final_result = 'unknown')
               AND EXISTS (
@@ -411,7 +924,8 @@ def finalize_exhausted_devices(con):
                     WHERE i.device_id = d.device_id
                       AND r.result = 'yes'
               );
-            """
+            """,
+            (now,),
         )
 
         # 2) Devices fully reviewed (no pending reviews), no 'yes', still unknown
@@ -420,7 +934,7 @@ def finalize_exhausted_devices(con):
             UPDATE devices AS d
             SET final_result = 'no',
                 final_decision_source_image_id = 'exhausted_images',
-                decided_at = datetime('now'),
+                decided_at = ?,
                 notes = COALESCE(notes, 'cleanup_no')
             WHERE (d.final_result IS NULL OR d.final_result = 'unknown')
               AND EXISTS (
@@ -444,10 +958,13 @@ def finalize_exhausted_devices(con):
                     WHERE i3.device_id = d.device_id
                       AND r.result = 'yes'
               );
-            """
+            """,
+            (now,),
         )
 
 
+_ZERO_SUFFIXES = ("_000.jpg", "_000.jpeg")
+
 def _is_zero_variant(path: str) -> bool:
     """Check whether a file path corresponds to a `_000` image variant.
 
@@ -462,8 +979,8 @@ def _is_zero_variant(path: str) -> bool:
         `_000` images represent the primary variant of each device pair and are
         the only ones assigned for initial review batches.
     """
-    p = path.lower()
-    return p.endswith("_000.jpg") or p.endswith("_000.jpeg")
+    # Only the last 9 characters matter; avoid lower-casing the whole path
+    return path[-9:].lower().endswith(_ZERO_SUFFIXES)
 
 
 
@@ -475,28 +992,6 @@ def _is_zero_variant(path: str) -> bool:
 
 
 
-def _pair_path_for_zero(path: str) -> str | None:
-    """Derive the `_001` counterpart path for a given `_000` image.
-
-    Args:
-        path: Path or filename of the `_000` image.
-
-    Returns:
-        str | None: The corresponding `_001` path (same directory and extension)
-        if the input path ends with `_000.jpg` or `_000.jpeg`; otherwise None.
-
-    Example:
-        >>> _pair_path_for_zero("images/12345678901_000.jpg")
-        'images/12345678901_001.jpg'
-    """
-    # Returns the _001 image path by changing the suffix without changing the file extension
-    p = path.lower()
-    if p.endswith("_000.jpg"):
-        return path[:-8] + "_001.jpg"
-    elif p.endswith("_000.jpeg"):
-        return path[:-9] + "_001.jpeg"
-    return None
-
 def _fetch_pair_review(con, path_zero: str):
     """Retrieve the active (not 'done') review row for the paired `_001` image.
 
@@ -511,25 +1006,15 @@ def _fetch_pair_review(con, path_zero: str):
             otherwise None.
 
     Notes:
-        - This function joins the `images` and `reviews` tables to find the pair.
+        - The pair is resolved through `images.pair_image_id` (an integer key
+          join) rather than by rewriting the path string.
         - It orders by `rowid ASC` to ensure deterministic selection if multiple
           rows exist (e.g., QC duplicates).
     """
-    pair_path = _pair_path_for_zero(path_zero)
-    if not pair_path:
-        return None
-    row = con.execute(
-        """
-        SELECT r.review_id, i.image_id, i.path, i.device_id, i.qc_flag
-        FROM images i
-        JOIN reviews r USING(image_id)
-        WHERE i.path=? AND r.status!='done'
-        ORDER BY r.rowid ASC
-        LIMIT 1
-        """,
-        (pair_path,),
+    return con.execute(
+        _SQL_FETCH_PAIR_REVIEW,
+        (path_zero,),
     ).fetchone()
-    return row
 
 def auto_skip_pair(con, path_zero: str, standard_version: str, user: str, batch_id: str):
     """Mark the `_001` paired image as 'skip' when its `_000` counterpart is finalized.
@@ -542,33 +1027,21 @@ def auto_skip_pair(con, path_zero: str, standard_version: str, user: str, batch_
         batch_id: UUID of the current review batch.
 
     Behavior:
-        If an unfinished `_001` review exists for the same device, this function:
+        If an unfinished `_001` review exists for the same device, a single
+        UPDATE (no preliminary SELECT):
           * Updates its `status` to `'done'`
           * Sets `result='skip'`
-          * Stamps `decided_at=datetime('now')`
+          * Stamps `decided_at` with the current UTC time
           * Records `standard_version`, `assigned_to`, and `batch_id`
 
     Returns:
         None
     """
-    pair = _fetch_pair_review(con, path_zero)
-    if not pair:
-        return
-    pair_review_id = pair[0]
-    with con:
-        con.execute(
-            """
-            UPDATE reviews
-            SET status='done', 
-                result='skip', 
-                decided_at=datetime('now'), 
-                standard_version=?,
-                assigned_to=?,
-                batch_id=?
-            WHERE review_id=? AND status!='done';
-            """,
-            (standard_version, user, batch_id, pair_review_id),
-        )
+    con.execute(
+        _SQL_AUTO_SKIP_PAIR,
+        {"now": _now_iso(), "standard_version": standard_version,
+         "user": user, "batch_id": batch_id, "path": path_zero},
+    )
 
 def assign_pair_now(con, path_zero: str, user: str, batch_id: str):
     """Assign the `_001` paired image for immediate review and return its metadata tuple.
@@ -589,26 +1062,9 @@ def assign_pair_now(con, path_zero: str, user: str, batch_id: str):
           appear next in the session.
         - The pair review row’s `status` is updated to `'in_progress'` and stamped
           with the same `assigned_to` and `batch_id`.
+        - Lookup, update, and metadata fetch are a single statement.
     """
-    pair = _fetch_pair_review(con, path_zero)
-    if not pair:
-        return None
-    pair_review_id = pair[0]
-    with con:
-        con.execute(
-            """
-            UPDATE reviews
-            SET status='in_progress', assigned_to=?, batch_id=?
-            WHERE review_id=? AND status!='done';
-            """,
-            (user, batch_id, pair_review_id),
-        )
-    # return the same tuple shape App expects: (review_id, image_id, path, device_id, qc_flag)
     return con.execute(
-        """
-        SELECT r.review_id, i.image_id, i.path, i.device_id, i.qc_flag
-        FROM reviews r JOIN images i USING(image_id)
-        WHERE r.review_id=?;
-        """,
-        (pair_review_id,),
-    ).fetchone()
\ No newline at end of file
+        _SQL_ASSIGN_PAIR,
+        {"user": user, "batch_id": batch_id, "path": path_zero},
+    ).fetchone()
@@ -7,6 +7,14 @@ space, enabling accurate click annotation recording.
 
 Functions:
     load_image(path):            Load an image from disk using Pillow (PIL).
+    load_for_display(path, c):   Open, crop, and scale in one pass, letting the
+                                 JPEG decoder downscale (draft mode) so only
+                                 the pixels needed for display are decoded.
+    cached_load_for_display(path, c, dir):
+                                 `load_for_display` backed by an on-disk cache
+                                 of rendered PNGs in the local cache_dir.
+    Prefetcher(paths, c, dir):   Renders the next few images of a batch on
+                                 worker threads while the current one is shown.
     _crop_for_display(img, cfg): Crop according to configuration parameters.
     resize_for_screen(img, n):   Resize an image while maintaining aspect ratio.
     prepare_for_display(img, c): Full preprocessing pipeline returning both
@@ -20,7 +28,25 @@ Coordinate conventions:
       the *original* uncropped image dimensions.
 """
 
-from PIL import Image
+import hashlib, io, json, math, os, tempfile, threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, PngImagePlugin
+
+# Box-reduce by an integer factor before LANCZOS when shrinking by >= 2x this
+_REDUCING_GAP = 2.0
+
+def _open(path: str) -> Image.Image:
+    """Open an image from a single whole-file read.
+
+    Pillow otherwise pulls the file through many small reads while decoding;
+    over an SMB share each one can be a network round-trip. Reading the file
+    in one call and decoding from memory also releases the file handle at
+    once, so nothing keeps the file open on the share while it is shown.
+    """
+    with open(path, "rb") as f:
+        return Image.open(io.BytesIO(f.read()))
 
 def load_image(path: str) -> Image.Image:
     """Load an image from disk into a Pillow Image object.
@@ -35,44 +61,29 @@ def load_image(path: str) -> Image.Image:
         FileNotFoundError: If the path does not exist.
         OSError: If the file cannot be read as an image.
     """
-    img = Image.open(path)
+    img = _open(path)
     img.load()
     return img
 
-def _crop_for_display(img: Image.Image, cfg_image: dict | None):
-    """Optionally crop an image based on configuration parameters.
+def _crop_box(size, cfg_image: dict | None):
+    """Compute the display crop rectangle for an image of the given size.
 
     Args:
-        img: Pillow image to crop.
-        cfg_image: Dictionary of image display configuration, e.g.:
-            {
-              "crop_width": int,
-              "crop_height": int,
-              "h_align": "left" | "center" | "right",
-              "v_align": "top"  | "center" | "bottom"
-            }
+        size: `(W, H)` of the original image.
+        cfg_image: Image display configuration (see `_crop_for_display`).
 
     Returns:
-        tuple:
-          (cropped_image, (x0, y0, cw, ch))
-          where:
-            x0, y0  — top-left crop offset in original image coordinates
-            cw, ch  — crop width and height in pixels
-
-    Notes:
-        - If crop dimensions are missing or invalid, the original image is
-          returned unchanged.
-        - Cropping is clamped to the image boundaries.
+        tuple: `(x0, y0, cw, ch)` in original image coordinates; the full
+        image if no valid crop is configured.
     """
+    W, H = size
     if not cfg_image:
-        return img, (0,0,img.size[0],img.size[1])
+        return 0, 0, W, H
     cw = cfg_image.get("crop_width")
     ch = cfg_image.get("crop_height")
     if not cw or not ch:
-        W, H = img.size
-        return img, (0,0,W,H)
+        return 0, 0, W, H
 
-    W, H = img.size
     cw = min(max(1,cw), W)
     ch = min(max(1,ch), H)
 
@@ -93,9 +104,55 @@ def _crop_for_display(img: Image.Image, cfg_image: dict | None):
     else:  # center
         y0 = (H - ch) // 2
 
-    x1 = x0+cw
-    y1 = y0+ch
-    return img.crop((int(x0), int(y0), int(x1), int(y1))), (int(x0), int(y0), int(cw), int(ch))
+    return int(x0), int(y0), int(cw), int(ch)
+
+def _max_side(cfg_image: dict | None) -> int:
+    """Return the configured display bound for the longer side (default 1280)."""
+    if cfg_image and isinstance(cfg_image.get("max_display_side"), int):
+        return cfg_image["max_display_side"]
+    return 1280
+
+def _display_size(w: int, h: int, max_side: int):
+    """Return `((dw, dh), scale)` fitting `w x h` to `max_side` on the long side.
+
+    The long side is exactly `max_side` and the short side is rounded (not
+    truncated), so the per-axis ratios `dw / w` and `dh / h` differ by at most
+    half a display pixel.
+    """
+    scale = max_side / max(w, h)
+    if w >= h:
+        return (max_side, max(1, round(h * scale))), scale
+    return (max(1, round(w * scale)), max_side), scale
+
+def _crop_for_display(img: Image.Image, cfg_image: dict | None):
+    """Optionally crop an image based on configuration parameters.
+
+    Args:
+        img: Pillow image to crop.
+        cfg_image: Dictionary of image display configuration, e.g.:
+            {
+              "crop_width": int,
+              "crop_height": int,
+              "h_align": "left" | "center" | "right",
+              "v_align": "top"  | "center" | "bottom"
+            }
+
+    Returns:
+        tuple:
+          (cropped_image, (x0, y0, cw, ch))
+          where:
+            x0, y0  — top-left crop offset in original image coordinates
+            cw, ch  — crop width and height in pixels
+
+    Notes:
+        - If crop dimensions are missing or invalid, the original image is
+          returned unchanged.
+        - Cropping is clamped to the image boundaries.
+    """
+    x0, y0, cw, ch = _crop_box(img.size, cfg_image)
+    if (cw, ch) == img.size:
+        return img, (0, 0, cw, ch)
+    return img.crop((x0, y0, x0 + cw, y0 + ch)), (x0, y0, cw, ch)
 
 def resize_for_screen(img: Image.Image, max_side=1280):
     """Resize an image to fit within a given bounding box.
@@ -113,11 +170,13 @@ def resize_for_screen(img: Image.Image, max_side=1280):
           where `scale` = resized_side / original_side (float).
 
     Notes:
-        The resize uses LANCZOS resampling for high-quality downscaling.
+        The resize uses LANCZOS resampling for high-quality downscaling. Large
+        reductions first box-reduce by an integer factor (`reducing_gap`),
+        which roughly halves the cost at a negligible quality difference.
     """
     w, h = img.size
-    scale = max_side / max(w,h)
-    return img.resize((int(w * scale), int(h * scale)), Image.LANCZOS), scale
+    size, scale = _display_size(w, h, max_side)
+    return img.resize(size, Image.LANCZOS, reducing_gap=_REDUCING_GAP), scale
 
 def prepare_for_display(img: Image.Image, cfg_image: dict | None):
     """Prepare an image for on-screen display with optional crop and scale.
@@ -147,10 +206,7 @@ def prepare_for_display(img: Image.Image, cfg_image: dict | None):
     """
     W, H = img.size
     cropped, (x0, y0, cw, ch) = _crop_for_display(img, cfg_image)
-    max_side = 1280
-    if cfg_image and isinstance(cfg_image.get("max_display_side"), int):
-        max_side = cfg_image["max_display_side"]
-    disp, scale = resize_for_screen(cropped, max_side=max_side)
+    disp, scale = resize_for_screen(cropped, max_side=_max_side(cfg_image))
     dw, dh = disp.size
     info = {
         "original_size": (W, H),
@@ -158,4 +214,242 @@ def prepare_for_display(img: Image.Image, cfg_image: dict | None):
         "scale": scale,
         "displayed_size": (dw, dh),
     }
-    return disp, info
\ No newline at end of file
+    return disp, info
+def load_for_display(path: str, cfg_image: dict | None):
+    """Load an image from disk straight into its display form.
+
+    Equivalent to `prepare_for_display(load_image(path), cfg_image)`, but
+    cheaper for large JPEGs: the decoder is put in draft mode so libjpeg
+    scales by 1/2, 1/4 or 1/8 during the IDCT (never below the display size),
+    and the crop and final LANCZOS resize happen in one `resize(box=...)`
+    call. Other formats ignore the draft request and decode at full size.
+
+    Args:
+        path: Filesystem path to the image.
+        cfg_image: Dictionary with optional display settings (see `_crop_for_display`).
+
+    Returns:
+        tuple: `(display_image, info_dict)` exactly as `prepare_for_display`;
+        `info_dict` is always expressed in original-image coordinates.
+
+    Raises:
+        FileNotFoundError: If the path does not exist.
+        OSError: If the file cannot be read as an image.
+    """
+    img = _open(path)
+    W, H = img.size
+    x0, y0, cw, ch = _crop_box((W, H), cfg_image)
+    size, scale = _display_size(cw, ch, _max_side(cfg_image))
+
+    # Ask for at least the full-frame size that the display needs
+    img.draft(None, (max(1, math.ceil(W * scale)), max(1, math.ceil(H * scale))))
+    img.load()
+
+    # Crop rectangle in decoded pixels (identical to the original if no draft)
+    rx = img.size[0] / W
+    ry = img.size[1] / H
+    box = (x0 * rx, y0 * ry, (x0 + cw) * rx, (y0 + ch) * ry)
+    disp = img.resize(size, Image.LANCZOS, box=box, reducing_gap=_REDUCING_GAP)
+    info = {
+        "original_size": (W, H),
+        "crop": (x0, y0, cw, ch),
+        "scale": scale,
+        "displayed_size": size,
+    }
+    return disp, info
+
+
+# ---------------------------------------------------------------------------
+# On-disk display cache
+# ---------------------------------------------------------------------------
+
+_INFO_KEY = "review-display-info"
+
+class _RenderLRU:
+    """Thread-safe in-memory LRU of rendered images, bounded by pixel bytes.
+
+    Sits in front of the on-disk cache so a repeat within the session (QC
+    duplicates, a re-requested batch) skips even the PNG decode. Values are
+    shared, so callers must treat the returned images as read-only.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            hit = self._items.get(key)
+            if hit is not None:
+                self._items.move_to_end(key)
+            return hit
+
+    def put(self, key, value):
+        disp = value[0]
+        n = disp.width * disp.height * len(disp.getbands())
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._items[key] = (value, n)
+            self._bytes += n
+            while self._bytes > self.max_bytes and len(self._items) > 1:
+                self._bytes -= self._items.popitem(last=False)[1][1]
+
+_renders = _RenderLRU(128 * 1024 * 1024)
+
+def _cache_key(path: str, st, cfg_image: dict | None) -> str:
+    """Hash the source identity and display settings into a cache file stem."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(path.encode("utf-8", "surrogatepass"))
+    h.update(f"\0{st.st_mtime_ns}\0{st.st_size}\0".encode())
+    h.update(json.dumps(dict(cfg_image or {}), sort_keys=True).encode())
+    return h.hexdigest()
+
+def cached_load_for_display(path: str, cfg_image: dict | None, cache_dir: str | None):
+    """Like `load_for_display`, but reuse a rendered copy from `cache_dir`.
+
+    Entries are PNGs named by a hash of the path, the file's mtime and size,
+    and the display settings, so an edited image or changed `[image]` section
+    simply misses. The transform metadata rides along in a PNG text chunk.
+    Any cache I/O failure falls back to rendering from the source; the cache
+    never makes a load fail. Recent renders are also kept in memory (about
+    128 MiB), so repeats within a session skip the disk entirely.
+
+    Args:
+        path: Filesystem path to the image.
+        cfg_image: Dictionary with optional display settings (see `_crop_for_display`).
+        cache_dir: Local directory for cached renders; falsy disables caching.
+
+    Returns:
+        tuple: `(display_image, info_dict)` as from `load_for_display`.
+    """
+    key = _cache_key(path, os.stat(path), cfg_image)
+    hit = _renders.get(key)
+    if hit is not None:
+        return hit[0]
+    if not cache_dir:
+        result = load_for_display(path, cfg_image)
+        _renders.put(key, result)
+        return result
+    entry = os.path.join(cache_dir, key + ".png")
+    try:
+        disp = Image.open(entry)
+        disp.load()
+        raw = json.loads(disp.text[_INFO_KEY])
+        info = {k: tuple(v) if isinstance(v, list) else v for k, v in raw.items()}
+        os.utime(entry)  # mtime doubles as the LRU stamp for trim_display_cache
+        _renders.put(key, (disp, info))
+        return disp, info
+    except (OSError, KeyError, ValueError):
+        pass
+
+    disp, info = load_for_display(path, cfg_image)
+    _renders.put(key, (disp, info))
+    tmp = None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        meta = PngImagePlugin.PngInfo()
+        meta.add_text(_INFO_KEY, json.dumps(info))
+        # unique name: two prefetch workers may render the same key at once
+        fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".png")
+        with os.fdopen(fd, "wb") as f:
+            disp.save(f, "PNG", pnginfo=meta, compress_level=1)
+        os.replace(tmp, entry)
+        tmp = None
+    except (OSError, ValueError):
+        pass
+    finally:
+        if tmp is not None:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+    return disp, info
+
+def trim_display_cache(cache_dir: str | None, max_mb: int = 512):
+    """Delete the least recently used cache entries until under `max_mb`.
+
+    Args:
+        cache_dir: Directory used with `cached_load_for_display`.
+        max_mb: Size budget in MiB.
+    """
+    if not cache_dir:
+        return
+    try:
+        entries = []
+        with os.scandir(cache_dir) as it:
+            for e in it:
+                if e.name.endswith(".png") and e.is_file():
+                    st = e.stat()
+                    entries.append((st.st_mtime_ns, st.st_size, e.path))
+    except OSError:
+        return
+    total = sum(size for _, size, _ in entries)
+    budget = max_mb * 1024 * 1024
+    for _, size, p in sorted(entries):
+        if total <= budget:
+            break
+        try:
+            os.remove(p)
+        except OSError:
+            continue
+        total -= size
+
+
+# ---------------------------------------------------------------------------
+# Read-ahead
+# ---------------------------------------------------------------------------
+
+class Prefetcher:
+    """Render upcoming images of a batch in the background.
+
+    `get(i)` returns image `i` (blocking only if it is not ready yet; use
+    `future(i)` to poll instead) and queues `i+1 .. i+ahead` on a small
+    thread pool. JPEG decoding and
+    resampling release the GIL, so the work overlaps the reviewer's decision
+    time. At most `2 * ahead + 1` renders are kept.
+    """
+
+    def __init__(self, paths, cfg_image: dict | None, cache_dir: str | None = None,
+                 ahead: int = 2, max_workers: int = 2):
+        self.paths = list(paths)
+        self.cfg_image = cfg_image
+        self.cache_dir = cache_dir
+        self.ahead = ahead
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="prefetch")
+        self._futures = OrderedDict()
+
+    def _submit(self, i: int):
+        if 0 <= i < len(self.paths) and i not in self._futures:
+            self._futures[i] = self._pool.submit(
+                cached_load_for_display, self.paths[i], self.cfg_image, self.cache_dir
+            )
+            while len(self._futures) > 2 * self.ahead + 1:
+                self._futures.popitem(last=False)[1].cancel()
+
+    def future(self, i: int):
+        """Return the `Future` rendering `paths[i]`, queueing read-ahead too.
+
+        Lets a GUI poll `done()` instead of blocking its event loop.
+        """
+        self._submit(i)
+        fut = self._futures[i]
+        for j in range(i + 1, i + 1 + self.ahead):
+            self._submit(j)
+        return fut
+
+    def get(self, i: int):
+        """Return `(display_image, info_dict)` for `paths[i]`.
+
+        Raises:
+            Whatever `cached_load_for_display` raised for that image.
+        """
+        return self.future(i).result()
+
+    def close(self):
+        """Drop queued work; renders already running finish in the background."""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._futures.clear()
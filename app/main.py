@@ -30,23 +30,26 @@ import getpass, os, tkinter as tk
 import sys
 from tkinter import messagebox
 from PIL import ImageTk
-from pathlib import Path
 
-from app.config import load_config
+from app.config import _bundle_root, load_config
 from app.db import (
     connect,
     ensure_schema,
     assign_batch,
     record_decision,
-    _set_user_version,
     add_annotation,
-    get_device_review_results,
+    flush_annotations,
     finalize_device_yes,
     finalize_device_no_by_pattern,
-    finalize_exhausted_devices
+    finalize_exhausted_devices,
+    release_batch,
+    Writer,
+    housekeeping,
 )
-from app.io_image import load_image, prepare_for_display
+from app.io_image import Prefetcher, trim_display_cache
 
+# schema.sql ships beside the EXE when frozen, else at the repo root
+_SCHEMA_PATH = str(_bundle_root() / "schema.sql")
 
 class App(tk.Tk):
     """Main Tkinter window for image review.
@@ -70,10 +73,19 @@ class App(tk.Tk):
         self.cfg = load_config()
         bindings = self.cfg["RESULT_BINDINGS"]
 
-        # Dynamically bind all configured key shortcuts (e.g., yes/no/skip)
+        # All configured key shortcuts (e.g., yes/no/skip) go through one
+        # <Key> handler and a keysym -> result lookup
+        self._keymap = {}
         for result, keys in bindings.items():
             for k in keys:
-                self._bind_result_key(k, result)
+                self._add_result_key(k, result)
+        self.bind("<Key>", self._on_key)
+
+        # Per-click lookups: (action, point) per mouse button
+        self._mouse = {
+            btn: (m.get("action"), m.get("point", False))
+            for btn, m in self.cfg["MOUSE"].items()
+        }
 
         self.bind("<Escape>", lambda e: self._abort_and_close())
         self.protocol("WM_DELETE_WINDOW", self._abort_and_close)  # handle window close
@@ -83,19 +95,20 @@ class App(tk.Tk):
         # Database initialization
         # ------------------------------------------------------------------
         self.con = connect(self.cfg["DB_PATH"])
-        from sys import executable
-        bundle_dir = (
-            Path(executable).parent
-            if getattr(sys, "frozen", False)
-            else Path(__file__).resolve().parents[1]
-        )
-        ensure_schema(self.con, str(bundle_dir / "schema.sql"))
-        _set_user_version(self.con, 2)
+        ensure_schema(self.con, _SCHEMA_PATH)
+        # Decisions and clicks are queued to a writer thread, which groups
+        # them into shared transactions; flushed after each decision, before
+        # each new batch and on exit
+        self.writer = Writer(self.cfg["DB_PATH"])
+
+        # Keep the local display cache bounded (oldest renders go first)
+        trim_display_cache(self.cfg["CACHE_DIR"])
 
         self.user = getpass.getuser()
         self.batch_id = None
         self.items = []
         self.index = 0
+        self.prefetch = None
 
         # ------------------------------------------------------------------
         # UI Layout
@@ -105,6 +118,12 @@ class App(tk.Tk):
 
         self.img_label = tk.Label(self)
         self.img_label.pack(expand=True)
+        self.img_label.image = None  # current ImageTk.PhotoImage
+        # Track the label size from <Configure> so clicks don't query Tk
+        self._label_size = (0, 0)
+        self.img_label.bind(
+            "<Configure>", lambda e: setattr(self, "_label_size", (e.width, e.height))
+        )
 
         # Mouse bindings for click-to-annotate or click-to-classify
         self.img_label.bind("<Button-1>", self._on_left_click)
@@ -122,6 +141,7 @@ class App(tk.Tk):
         # Internal state for current display transform (used for click mapping)
         self._current_transform = None  # holds transform info for current image
         self._current_image_size = None  # displayed size for offset calc
+        self._pending = None  # prefetch future of an image still decoding
 
         # Fetch the first batch
         self.new_batch()
@@ -151,23 +171,58 @@ class App(tk.Tk):
     # Core workflow
     # ----------------------------------------------------------------------
     def refresh(self):
-        """Display the current image or advance to the next batch if finished."""
-        if self.index >= len(self.items):
-            if messagebox.askyesno("Batch complete", "Request another set?"):
-                self.new_batch()
-            else:
-                self.destroy()
+        """Display the current image or advance to the next batch if finished.
+
+        Unreadable images are reported and skipped in a loop (not by
+        recursion), so a run of bad files cannot grow the stack.
+        """
+        while self.index < len(self.items):
+            # Decode runs on the prefetch threads; poll so the event loop stays
+            # responsive. Input is ignored until the image is on screen.
+            fut = self.prefetch.future(self.index)
+            self._pending = fut
+            if not fut.done():
+                self.after(15, self._poll_image, fut)
+                return
+            if self._show(fut):
+                return
+            self.index += 1
+
+        if messagebox.askyesno("Batch complete", "Request another set?"):
+            self.new_batch()
+        else:
+            self.destroy()
+
+    def _poll_image(self, fut):
+        """Show `fut`'s image once it is ready, unless the session moved on."""
+        if fut is not self._pending:
             return
+        if not fut.done():
+            self.after(15, self._poll_image, fut)
+        elif not self._show(fut):
+            self.index += 1
+            self.refresh()
+
+    def _show(self, fut) -> bool:
+        """Render a finished prefetch future for the current item.
 
+        Returns:
+            bool: False if the image could not be loaded (already reported).
+        """
+        self._pending = None
         review_id, image_id, path, device_id, qc_flag = self.items[self.index]
         try:
-            img = load_image(path)
-            ds, info = prepare_for_display(img, self.cfg.get("IMAGE"))
+            ds, info = fut.result()
 
-            # render
-            tkimg = ImageTk.PhotoImage(ds)
-            self.img_label.configure(image=tkimg)
-            self.img_label.image = tkimg
+            # render: reuse the Tk photo when the size matches (the common case
+            # with a fixed crop), otherwise allocate one of the new size
+            tkimg = self.img_label.image
+            if tkimg is not None and (tkimg.width(), tkimg.height()) == ds.size:
+                tkimg.paste(ds)
+            else:
+                tkimg = ImageTk.PhotoImage(ds)
+                self.img_label.configure(image=tkimg)
+                self.img_label.image = tkimg
 
             # lock the label size to the image to keep (0,0) aligned
             dw, dh = info["displayed_size"]
@@ -181,10 +236,10 @@ class App(tk.Tk):
                      f"Device: {device_id} | {self.index + 1}/{len(self.items)} | "
                      f"{os.path.basename(path)}{' | QC' if qc_flag else ''}"
             )
+            return True
         except Exception as e:
             messagebox.showerror("Load error", f"{path}\n{e}")
-            self.index += 1
-            self.refresh()
+            return False
 
     # ----------------------------------------------------------------------
     # Coordinate mapping for click annotations
@@ -207,20 +262,21 @@ class App(tk.Tk):
         info = self._current_transform
         (W, H) = info["original_size"]
         (x0, y0, cw, ch) = info["crop"]
-        scale = info["scale"]
         (dw, dh) = info["displayed_size"]
 
         # If label larger than image, center offset (we set width/height so this should be 0)
-        ox = max((self.img_label.winfo_width() - dw) // 2, 0)
-        oy = max((self.img_label.winfo_height() - dh) // 2, 0)
+        lw, lh = self._label_size
+        ox = max((lw - dw) // 2, 0)
+        oy = max((lh - dh) // 2, 0)
         ux = cx - ox
         uy = cy - oy
         if ux < 0 or uy < 0 or ux > dw or uy > dh:
             return None  # outside image
 
-        # back to cropped coordinates, then to original
-        x_in_cropped = ux / scale
-        y_in_cropped = uy / scale
+        # back to cropped coordinates (per axis, so rounding of the short
+        # display side can't skew the mapping), then to original
+        x_in_cropped = ux * cw / dw
+        y_in_cropped = uy * ch / dh
         x_orig = x0 + x_in_cropped
         y_orig = y0 + y_in_cropped
         # normalize 0..1 in original image
@@ -239,23 +295,19 @@ class App(tk.Tk):
 
     def _handle_click(self, event, button: str):
         """Handle click events for left/right buttons per configuration."""
-        cfg = self.cfg["MOUSE"].get(button, {})
-        action = cfg.get("action")
-        want_point = cfg.get("point", False)
+        action, want_point = self._mouse.get(button, (None, False))
 
         if not action:
             return  # button not configured
+        if self._pending is not None:
+            return  # current image not shown yet
 
         # optional annotation
         if want_point:
             pt = self._map_click_to_original(event.x, event.y)
             if pt is not None:
                 review_id, *_ = self.items[self.index]
-                try:
-                    add_annotation(self.con, review_id, pt[0], pt[1], button)
-                except Exception as e:
-                    # don't block the flow if annotation fails
-                    messagebox.showwarning("Annotation", f"Failed to save click: {e}")
+                self.writer.submit(add_annotation, review_id, pt[0], pt[1], button)
 
         # mark decision and advance
         self.mark(action)
@@ -263,41 +315,84 @@ class App(tk.Tk):
     # ----------------------------------------------------------------------
     # Batch control
     # ----------------------------------------------------------------------
+    def _warn_write_errors(self, errors):
+        """Show queued-write failures reported by the writer thread."""
+        if errors:
+            messagebox.showwarning(
+                "Database", "Some changes could not be saved:\n" + "\n".join(map(str, errors))
+            )
+
+    def _flush_writes(self):
+        """Wait for queued writes to commit and show any that failed."""
+        try:
+            errors = self.writer.flush()
+        except RuntimeError as e:
+            errors = [e]
+        self._warn_write_errors(errors)
+
     def _abort_and_close(self):
         """Release any in-progress items back to the pool and close the app."""
         if self.batch_id:
-            try:
-                from app.db import release_batch
-                release_batch(self.con, self.user, self.batch_id)
-            except Exception as e:
-                messagebox.showwarning("Release Warning", f"Could not find release batch: {e}")
+            # also writes any buffered clicks
+            self.writer.submit(release_batch, self.user, self.batch_id)
+        else:
+            self.writer.submit(flush_annotations)
         self.destroy()
 
-    def _bind_result_key(self, key: str, result: str):
-        """Bind a keyboard key (and optionally uppercase variant) to a result label."""
+    def destroy(self):
+        """Commit any queued writes before the window goes away."""
+        if self.prefetch:
+            self.prefetch.close()
+        try:
+            errors = self.writer.close()
+        except RuntimeError as e:
+            errors = [e]
+        self._warn_write_errors(errors)
+        try:
+            housekeeping(self.con)
+        except Exception as e:
+            # best effort (e.g. another reviewer holds the write lock); the
+            # database is still consistent
+            print(f"Housekeeping skipped: {e}", file=sys.stderr)
+        super().destroy()
+
+    def _add_result_key(self, key: str, result: str):
+        """Map a keyboard key (and optionally uppercase variant) to a result label."""
         k = key.strip()
         if k == " ":
             k = "space"      # normalize literal space to Tk keysym
-        # For single-letter keys, bind lower + UPPER
+        # For single-letter keys, map lower + UPPER
         if len(k) == 1 and k.isalpha():
-            seqs = [f"<{k}>", f"<{k.upper()}>"]
+            self._keymap[k.lower()] = result
+            self._keymap[k.upper()] = result
         else:
-            seqs = [f"<{k}>"]  # multi-char keysyms (space, Return, Escape, etc.)
-        for seq in seqs:
-            self.bind(seq, lambda e, r=result: self.mark(r))
+            self._keymap[k] = result  # multi-char keysyms (space, Return, etc.)
+
+    def _on_key(self, event):
+        """Dispatch a key press to `mark()` if it is bound to a result."""
+        result = self._keymap.get(event.keysym)
+        if result is not None:
+            self.mark(result)
 
     def new_batch(self):
         """Fetch a new set of unassigned reviews and reset progress."""
+        # Queued decisions must be committed before picking the next batch
+        self._flush_writes()
         self.batch_id, self.items = assign_batch(
             self.con, self.user, self.cfg["BATCH_SIZE"]
         )
         self.index = 0
+        if self.prefetch:
+            self.prefetch.close()
+        # Render the next images while the reviewer looks at the current one
+        self.prefetch = Prefetcher(
+            [item[2] for item in self.items], self.cfg.get("IMAGE"), self.cfg["CACHE_DIR"]
+        )
         if not self.items:
+            # Device cleanup runs on the writer while the dialog is up;
+            # destroy() waits for it and reports any failure
+            self.writer.submit(finalize_exhausted_devices)
             messagebox.showinfo("Done", "No unassigned images remain.")
-            try:
-                finalize_exhausted_devices(self.con)
-            except Exception as e:
-                messagebox.showwarning("Cleanup", f"Device cleanup failed: {e}")
             self.destroy()
             return
         self.refresh()
@@ -330,22 +425,23 @@ class App(tk.Tk):
                 verbatim to the `reviews.result` column.
 
         Side Effects:
-            - Writes to the `reviews` table via `record_decision(...)`.
+            - Queues a write to the `reviews` table via `record_decision(...)`.
             - May trigger device-level auto-skip via YES rule or NO–SKIP–SKIP rule.
             - Mutates `self.index` and triggers a UI redraw with `self.refresh()`.
 
         Returns:
             None
         """
-        if not self.items:
-            return
+        if not self.items or self._pending is not None:
+            return  # nothing to decide, or the image is still loading
 
         # Current item layout: (review_id, image_id, path, device_id, qc_flag)
         review_id, image_id, path, device_id, _ = self.items[self.index]
 
-        # 1) Record the decision for this specific review row
-        record_decision(
-            self.con,
+        # 1) Record the decision for this specific review row (queued, and
+        #    flushed below so a failure is reported for this image)
+        self.writer.submit(
+            record_decision,
             review_id,
             self.user,
             self.batch_id,
@@ -353,40 +449,43 @@ class App(tk.Tk):
             self.cfg["STANDARD_VERSION"],
         )
 
-        # 2) Device-level auto-skip rules
-        try:
-            # YES rule: highest priority
-            if result == "yes":
-                finalize_device_yes(
-                    self.con,
-                    device_id=device_id,
-                    image_id=image_id,
-                    user=self.user,
-                    batch_id=self.batch_id,
-                    standard_version=self.cfg["STANDARD_VERSION"],
-                )
-
-            # else:
-            #     # NO–SKIP–SKIP rule: check last three completed results for this device
-            #     history = get_device_review_results(self.con, device_id)
-            #     # history is list of (variant, result), e.g. [('000','no'), ('001','skip'), ('002','skip')]
-            #     # if 'yes' was decided at any point, the entire device was finalized (above). Therefore, it does not
-            #     # matter what the third-to-last decision was. If there have been 3 decisions (none of which were 'yes')
-            #     # and the last two were 'skip', the entire device can be finalized as 'no' based on the repeated-skip
-            #     # pattern.
-            #     if len(history) >= 3:
-            #         last_two = [r for (_, r) in history[-2:]]
-            #         if last_two == ["skip", "skip"]:
-            #             finalize_device_no_by_pattern(
-            #                 self.con,
-            #                 device_id=device_id,
-            #                 user=self.user,
-            #                 batch_id=self.batch_id,
-            #                 standard_version=self.cfg["STANDARD_VERSION"],
-            #             )
-        except Exception as e:
-            # Non-fatal: the primary decision has been saved; warn but continue
-            messagebox.showwarning("Auto-skip", f"Device-level auto-skip failed: {e}")
+        # 2) Device-level auto-skip rules (queued after the decision; each op
+        #    is rolled back on its own if it fails)
+        # YES rule: highest priority
+        if result == "yes":
+            self.writer.submit(
+                finalize_device_yes,
+                device_id=device_id,
+                image_id=image_id,
+                user=self.user,
+                batch_id=self.batch_id,
+                standard_version=self.cfg["STANDARD_VERSION"],
+            )
+
+        # else:
+        #     # NO–SKIP–SKIP rule: check last three completed results for this device
+        #     # The decision above is queued, so flush before reading the history.
+        #     self._flush_writes()
+        #     history = get_device_review_results(self.con, device_id)
+        #     # history is list of (variant, result), e.g. [('000','no'), ('001','skip'), ('002','skip')]
+        #     # if 'yes' was decided at any point, the entire device was finalized (above). Therefore, it does not
+        #     # matter what the third-to-last decision was. If there have been 3 decisions (none of which were 'yes')
+        #     # and the last two were 'skip', the entire device can be finalized as 'no' based on the repeated-skip
+        #     # pattern.
+        #     if len(history) >= 3:
+        #         last_two = [r for (_, r) in history[-2:]]
+        #         if last_two == ["skip", "skip"]:
+        #             self.writer.submit(
+        #                 finalize_device_no_by_pattern,
+        #                 device_id=device_id,
+        #                 user=self.user,
+        #                 batch_id=self.batch_id,
+        #                 standard_version=self.cfg["STANDARD_VERSION"],
+        #             )
+
+        # Commit the decision (and any device rule) now, so a failed write
+        # is shown before the reviewer moves on
+        self._flush_writes()
 
         # 3) Advance to the next item in the batch
         self.index += 1
@@ -41,6 +41,8 @@ PRAGMA foreign_keys=ON;
 -- device_id  — an identifier derived from filename or metadata
 -- sha256     — content hash for integrity and duplicate detection
 -- qc_flag    — marks roughly 10% of images as duplicates for quality control
+-- pair_image_id — for a `000` image, the `001` image of the same device
+--                 (maintained by trg_images_pair)
 CREATE TABLE IF NOT EXISTS images (
   image_id      INTEGER PRIMARY KEY AUTOINCREMENT,
   device_id     TEXT NOT NULL, -- 11-digit ID parsed from filename
@@ -49,12 +51,25 @@ CREATE TABLE IF NOT EXISTS images (
   qc_flag       INTEGER NOT NULL DEFAULT 0,   -- 1 if image is part of QC sampling
   registered_at TEXT DEFAULT (datetime('now')),
   sha256        TEXT UNIQUE NOT NULL,
+  pair_image_id INTEGER REFERENCES images(image_id), -- `001` partner of a `000` image
   UNIQUE (device_id, variant) -- each device-variant pair should be unique
 );
 
--- Helpful indexes for device/variant-based queries
-CREATE INDEX IF NOT EXISTS idx_images_device ON images(device_id);
-CREATE INDEX IF NOT EXISTS idx_images_device_variant ON images(device_id, variant);
+-- Device and device/variant lookups use the UNIQUE (device_id, variant)
+-- index; no separate indexes, so ingest maintains one fewer B-tree per row
+
+-- Link `000` and `001` images of a device regardless of insertion order
+CREATE TRIGGER IF NOT EXISTS trg_images_pair
+AFTER INSERT ON images
+WHEN NEW.variant IN ('000', '001')
+BEGIN
+  UPDATE images SET pair_image_id = NEW.image_id
+  WHERE NEW.variant = '001' AND device_id = NEW.device_id AND variant = '000';
+  UPDATE images SET pair_image_id = (
+      SELECT image_id FROM images WHERE device_id = NEW.device_id AND variant = '001'
+  )
+  WHERE NEW.variant = '000' AND image_id = NEW.image_id;
+END;
 
 -- ---------------------------------------------------------------------------
 -- Table: reviews
@@ -66,6 +81,9 @@ CREATE INDEX IF NOT EXISTS idx_images_device_variant ON images(device_id, varian
 -- status ∈ {unassigned, in_progress, done}
 -- result — free-text label (yes, no, skip, etc.) defined in configuration.
 -- batch_id — UUID grouping the reviews fetched together by assign_batch().
+-- pick_key — assignment order: variant in the high 32 bits, a random value in
+--            the low 32 bits, so batches are drawn by an index scan instead of
+--            ORDER BY RANDOM(). Filled by trg_reviews_pick_key on insert.
 CREATE TABLE IF NOT EXISTS reviews (
   review_id       INTEGER PRIMARY KEY AUTOINCREMENT,
   image_id        INTEGER NOT NULL,
@@ -76,11 +94,34 @@ CREATE TABLE IF NOT EXISTS reviews (
   standard_version TEXT, -- reference to script version
   decided_at      TEXT, -- datetime when decision was made
   notes           TEXT, -- optional free-text notes/audit info
+  pick_key        INTEGER, -- variant-major random order for assign_batch()
   FOREIGN KEY (image_id) REFERENCES images(image_id) ON DELETE CASCADE
 );
 
 CREATE INDEX IF NOT EXISTS idx_reviews_image ON reviews(image_id);
 CREATE INDEX IF NOT EXISTS idx_reviews_status ON reviews(status);
+-- release_batch(): WHERE batch_id=? AND assigned_to=? AND status='in_progress'
+CREATE INDEX IF NOT EXISTS idx_reviews_batch ON reviews(batch_id, assigned_to, status);
+-- assign_batch(): NOT EXISTS (... r2.image_id = ? AND r2.assigned_to = ?)
+-- Partial: never-assigned rows can't match, so they stay out of the index
+CREATE INDEX IF NOT EXISTS idx_reviews_image_assignee ON reviews(image_id, assigned_to)
+  WHERE assigned_to IS NOT NULL;
+-- device history lookups only look at completed reviews
+CREATE INDEX IF NOT EXISTS idx_reviews_image_done ON reviews(image_id) WHERE status='done';
+-- export_csv.py: WHERE status='done' ORDER BY decided_at, read in index order
+CREATE INDEX IF NOT EXISTS idx_reviews_done_decided ON reviews(decided_at) WHERE status='done';
+CREATE INDEX IF NOT EXISTS idx_reviews_unassigned_pick ON reviews(pick_key) WHERE status='unassigned';
+
+CREATE TRIGGER IF NOT EXISTS trg_reviews_pick_key
+AFTER INSERT ON reviews
+WHEN NEW.pick_key IS NULL
+BEGIN
+  UPDATE reviews
+  SET pick_key = (
+      SELECT CAST(variant AS INTEGER) * 4294967296 FROM images WHERE image_id = NEW.image_id
+  ) + (random() & 4294967295)
+  WHERE review_id = NEW.review_id;
+END;
 
 -- ------------------------------------------------------------
 -- Table: devices
@@ -112,3 +153,7 @@ CREATE TABLE IF NOT EXISTS annotations (
   button     TEXT CHECK(button IN ('left','right')) NOT NULL,
   created_at TEXT NOT NULL
 );
+
+-- draw_rings.py walks images -> reviews -> annotations in (image_id,
+-- review_id, ann_id) order; with this index no sort step is needed
+CREATE INDEX IF NOT EXISTS idx_annotations_review ON annotations(review_id);
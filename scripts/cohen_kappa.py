@@ -1,35 +1,70 @@
+import numpy as np
 import pandas as pd
-from sklearn.metrics import cohen_kappa_score
+
+try:
+    import pyarrow  # noqa: F401  (optional, faster CSV parsing)
+    _CSV_ENGINE = "pyarrow"
+except ImportError:
+    _CSV_ENGINE = "c"
+
+OUTCOME = "Loss of Coating Observed?"
+
+
+def _kappa(a, b, k):
+    """Cohen's kappa of two equal-length integer label arrays with codes in [0, k)."""
+    cm = np.bincount(a * k + b, minlength=k * k).reshape(k, k)
+    n = cm.sum()
+    po = np.trace(cm) / n
+    pe = cm.sum(axis=1) @ cm.sum(axis=0) / (n * n)
+    return (po - pe) / (1 - pe) if pe != 1 else float("nan")
 
 
 def main():
-    # Load your dataset
-    df = pd.read_csv("decisions.csv")
+    # Load your dataset (only the columns used below; pyarrow's multithreaded
+    # parser when it is installed)
+    df = pd.read_csv(
+        "decisions.csv",
+        usecols=["image id", "device_id", "user", "QC", OUTCOME],
+        engine=_CSV_ENGINE,
+    )
 
     # Keep only QC images
     qc = df[df["QC"] == 1]
 
     # Pivot: one row per image_id, columns for each reviewer’s outcome
-    qc_pivot = qc.pivot_table(
-        index=["image id", "device_id"],   # keeps uniqueness
-        columns="user",
-        values="Loss of Coating Observed?",
-        aggfunc='first'                    # ensures one value per reviewer
+    # (first value per reviewer; groupby + unstack is much cheaper than
+    # pivot_table for the same result)
+    qc_pivot = (
+        qc.groupby(["image id", "device_id", "user"])[OUTCOME]
+        .first()
+        .unstack("user")
     )
 
+    # Encode every outcome label as a small integer once (-1 = not reviewed),
+    # so the pair loop below is pure NumPy
+    codes, labels = pd.factorize(qc_pivot.to_numpy().ravel())
+    codes = codes.reshape(qc_pivot.shape)
+    reviewed = codes >= 0
+    k = len(labels)
+    col = {user: j for j, user in enumerate(qc_pivot.columns)}
+
     # Get all unique reviewer pairs
     reviewers = qc["user"].unique()
     pairs = [(r1, r2) for i, r1 in enumerate(reviewers) for r2 in reviewers[i+1:]]
 
 
     for r1, r2 in pairs:
+        if r1 not in col or r2 not in col:
+            continue  # reviewer has no recorded QC outcome
+        i, j = col[r1], col[r2]
         # Drop images where either reviewer didn’t review
-        valid = qc_pivot[[r1, r2]].dropna()
-        if len(valid) == 0:
+        both = reviewed[:, i] & reviewed[:, j]
+        n = int(both.sum())
+        if n == 0:
             continue  # skip if no overlap between these two reviewers
-        kappa = cohen_kappa_score(valid[r1], valid[r2])
-        print(f"{r1} vs {r2}: Cohen's Kappa = {kappa:.3f} (n={len(valid)})")
+        kappa = _kappa(codes[both, i], codes[both, j], k)
+        print(f"{r1} vs {r2}: Cohen's Kappa = {kappa:.3f} (n={n})")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
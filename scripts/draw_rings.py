@@ -27,14 +27,19 @@ import argparse
 import csv
 import sqlite3
 import os
-from collections import defaultdict
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from itertools import chain, groupby, islice
+from multiprocessing import freeze_support
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple
+from typing import Iterable, Iterator, List, Tuple
 
+import numpy as np
 from PIL import Image, ImageDraw
 
 from app.config import load_config
+from app.db import connect
 
 
 @dataclass
@@ -64,8 +69,23 @@ def norm_to_px(x: float, y: float, width: int, height: int) -> Tuple[int, int]:
     return x_px, y_px
 
 
-def fetch_annotations(conn: sqlite3.Connection) -> List[AnnRecord]:
-    """Return one row per (image_id, review_id) with all points grouped."""
+def norms_to_px(pts_norm: List[Tuple[float, float]], width: int, height: int) -> List[Tuple[int, int]]:
+    """Vectorized `norm_to_px` over a list of (x, y) points."""
+    if not pts_norm:
+        return []
+    arr = np.asarray(pts_norm, dtype=np.float64)
+    np.clip(arr, 0.0, 1.0, out=arr)
+    arr *= (max(1, width) - 1, max(1, height) - 1)
+    # np.rint rounds half to even, like round() in norm_to_px
+    return [tuple(p) for p in np.rint(arr).astype(np.int32).tolist()]
+
+
+def fetch_annotations(conn: sqlite3.Connection) -> Iterator[AnnRecord]:
+    """Yield one record per (image_id, review_id) with all points grouped.
+
+    Streams from the cursor: the query is ordered by image and review, so
+    each record is one consecutive run of rows.
+    """
     q = (
         """
         SELECT i.image_id,
@@ -80,63 +100,73 @@ def fetch_annotations(conn: sqlite3.Connection) -> List[AnnRecord]:
         ORDER BY i.image_id, r.review_id, a.ann_id
         """
     )
-    rows = conn.execute(q).fetchall()
-    grouped: Dict[Tuple[int, int, str, str], List[Point]] = defaultdict(list)
-    for image_id, image_path, review_id, outcome, x, y in rows:
-        grouped[(image_id, review_id, image_path, outcome)].append(Point(float(x), float(y)))
-
-    out: List[AnnRecord] = []
-    for (image_id, review_id, image_path, outcome), pts in grouped.items():
-        out.append(AnnRecord(
+    rows = conn.execute(q)
+    for (image_id, image_path, review_id, outcome), grp in groupby(
+        rows, key=lambda row: (row[0], row[1], row[2], row[3])
+    ):
+        yield AnnRecord(
             image_id=image_id,
             image_path=image_path,
             review_id=review_id,
             outcome=outcome or "",
-            points=pts,
-        ))
-    return out
+            points=[Point(float(row[4]), float(row[5])) for row in grp],
+        )
 
 
-def group_records(records: List[AnnRecord], per_review: bool) -> Iterable[Tuple[str, int, List[AnnRecord]]]:
+def group_records(records: Iterable[AnnRecord], per_review: bool) -> Iterable[Tuple[str, int, List[AnnRecord]]]:
     """
     Yield groups for output.
     If per_review=False (default): group by image_path (merge all reviews' points to one output).
     If per_review=True: each (image_id, review_id) is its own output.
     Returns tuples of (group_key, image_id, recs)
+
+    `records` must arrive ordered by image (as from `fetch_annotations`).
     """
     if per_review:
         for rec in records:
             key = f"{rec.image_path}::review:{rec.review_id}"
             yield key, rec.image_id, [rec]
     else:
-        groups: Dict[str, List[AnnRecord]] = defaultdict(list)
-        img_ids: Dict[str, int] = {}
-        for rec in records:
-            groups[rec.image_path].append(rec)
-            img_ids.setdefault(rec.image_path, rec.image_id)
-        for k, v in groups.items():
-            yield k, img_ids[k], v
+        for k, grp in groupby(records, key=lambda rec: rec.image_path):
+            recs = list(grp)
+            yield k, recs[0].image_id, recs
 
 
 def ensure_parent(path: Path) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
 
 
-def draw_ring(draw: ImageDraw.ImageDraw, cx: int, cy: int, radius: int, outline: str, width: int) -> None:
-    bbox = (cx - radius, cy - radius, cx + radius, cy + radius)
-    draw.ellipse(bbox, outline=outline, width=width)
+def draw_points(draw: ImageDraw.ImageDraw, points_px: List[Tuple[int, int]], radius: int, line_width: int,
+                outer: str, inner: str) -> None:
+    """Draw the outer (contrasting edge) and inner ring for every point with one `draw`."""
+    ellipse = draw.ellipse
+    r0 = radius + 1
+    lw = max(1, line_width)
+    for x, y in points_px:
+        ellipse((x - r0, y - r0, x + r0, y + r0), outline=outer, width=1)
+        ellipse((x - radius, y - radius, x + radius, y + radius), outline=inner, width=lw)
+
 
+def draw_rings_on_image(img: Image.Image, points_px: List[Tuple[int, int]], radius: int, line_width: int,
+                        opaque: bool = False) -> None:
+    if not points_px:
+        return
+    if opaque:
+        # Solid colors need no blending, so draw in the image's own mode
+        draw_points(ImageDraw.Draw(img), points_px, radius, line_width, "#000000", "#ffff00")
+        return
+    if img.mode == "RGB":
+        # Pillow alpha-blends each primitive onto RGB when drawing in "RGBA"
+        # mode, so the common JPEG case needs no full-size overlay or
+        # conversions; only the ring pixels are touched
+        draw_points(ImageDraw.Draw(img, "RGBA"), points_px, radius, line_width, "#00000080", "#ffff0080")
+        return
 
-def draw_rings_on_image(img: Image.Image, points_px: List[Tuple[int, int]], radius: int, line_width: int) -> None:
     convert_back = (img.mode != "RGBA")
     base = img.convert("RGBA") if convert_back else img
 
     overlay = Image.new("RGBA", base.size, (0,0,0,0))
-    draw = ImageDraw.Draw(overlay)
-    # Outer ring (contrasting edge), then inner ring
-    for x, y in points_px:
-        draw_ring(draw, x, y, radius + 1, outline="#00000080", width=1)
-        draw_ring(draw, x, y, radius, outline="#ffff0080", width=max(1, line_width))
+    draw_points(ImageDraw.Draw(overlay), points_px, radius, line_width, "#00000080", "#ffff0080")
 
     result = Image.alpha_composite(base, overlay)
     if convert_back:
@@ -152,23 +182,135 @@ def resolve_input_path(image_path_in_db: str, image_root: Path) -> Path:
     return p
 
 
-def make_output_path(src_path: Path, out_root: Path, image_root: Path, suffix: str) -> Path:
+def make_output_path(src_path: Path, out_root: Path, image_root: Path, suffix: str, ext: str = ".png") -> Path:
     try:
         rel = src_path.relative_to(image_root)
     except ValueError:
         # src is not under image_root; replicate parent structure under out_root using name only
         rel = src_path.name
     stem = src_path.stem
-    new_name = f"{stem}{suffix}.png"
+    new_name = f"{stem}{suffix}{ext}"
     if isinstance(rel, Path):
         return out_root / rel.parent / new_name
     else:
         return out_root / new_name
 
 
+_OUT_EXT = {"png": ".png", "jpeg": ".jpg"}
+
+# ProcessPoolExecutor rejects max_workers above 61 on Windows
+DEFAULT_WORKERS = min(61, os.cpu_count() or 1)
+
+# Images sent to a worker process per submit
+TASK_CHUNK = 16
+
+
+def render_group(task) -> Tuple[str, list | None]:
+    """Draw and save one output image (runs in a worker process).
+
+    Args:
+        task: `(image_id, recs, image_root, out_root, radius, line_width,
+            opaque, dry_run, out_format)`, where `recs` are the records
+            merged into this output and `out_format` is "png" or "jpeg".
+
+    Returns:
+        `(message, csv_row)`: `message` is a line to print (empty if none),
+        and `csv_row` is the manifest row, or None if the image was missing
+        or could not be read or written.
+    """
+    image_id, recs, image_root, out_root, radius, lw, opaque, dry_run, out_format = task
+
+    # Accumulate points and outcomes for this output
+    outcomes: List[str] = []
+    pts_norm: List[Tuple[float, float]] = []
+    review_ids: List[int] = []
+    # All recs share same image_path in both modes
+    image_path_in_db = recs[0].image_path
+    src_path = resolve_input_path(image_path_in_db, image_root)
+
+    for r in recs:
+        review_ids.append(r.review_id)
+        if r.outcome:
+            outcomes.append(str(r.outcome))
+        for p in r.points:
+            pts_norm.append((p.x_norm, p.y_norm))
+
+    if not src_path.exists():
+        return f"[MISSING] {src_path}", None
+
+    # Load image
+    try:
+        img = Image.open(src_path)
+        img.load()  # force read
+    except Exception as e:
+        return f"[ERROR] Failed to open {src_path}: {e}", None
+
+    w, h = img.size
+
+    # Convert all points to pixel coordinates
+    pts_px = norms_to_px(pts_norm, w, h)
+
+    # Prepare output path
+    suffix = f"_ann"
+    out_path = make_output_path(src_path, out_root, image_root, suffix, _OUT_EXT[out_format])
+    ensure_parent(out_path)
+
+    if not dry_run:
+        # img is opened fresh for this output only, so draw on it directly
+        draw_rings_on_image(img, pts_px, radius, lw, opaque=opaque)
+        try:
+            if out_format == "jpeg":
+                img.convert("RGB").save(out_path, "JPEG", quality=90)
+            else:
+                # zlib level 1: several times faster than the default 6 on
+                # photographic content, for somewhat larger files
+                img.save(out_path, "PNG", compress_level=1)
+        except Exception as e:
+            return f"[ERROR] Failed to save {out_path}: {e}", None
+
+    return "", [
+        image_id,
+        ";".join(str(x) for x in review_ids),
+        len(recs),
+        len(pts_px),
+        str(src_path),
+        str(out_path),
+        ";".join(outcomes) if outcomes else "",
+        ";".join(f"({x},{y})" for (x, y) in pts_px),
+    ]
+
+
+def _render_chunk(tasks) -> list:
+    """Run `render_group` over a list of tasks (one pool submit)."""
+    return [render_group(t) for t in tasks]
+
+
+def render_all(pool: ProcessPoolExecutor, tasks: Iterable, workers: int):
+    """Render `tasks` on `pool`, yielding `render_group` results in input order.
+
+    Tasks are sent in chunks of TASK_CHUNK with at most `2 * workers` chunks
+    in flight, so `tasks` can be a lazy stream over the annotations query
+    (`Executor.map` would submit every task up front).
+    """
+    tasks = iter(tasks)
+    window = deque()
+    while chunk := list(islice(tasks, TASK_CHUNK)):
+        window.append(pool.submit(_render_chunk, chunk))
+        if len(window) >= 2 * workers:
+            yield from window.popleft().result()
+    while window:
+        yield from window.popleft().result()
+
+
 def main():
     ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.ArgumentDefaultsHelpFormatter)
     ap.add_argument("--dry-run", action="store_true", help="Do not write images, only print and write CSV plan")
+    ap.add_argument("--opaque", action="store_true",
+                    help="Draw solid rings directly in the image's mode (no alpha blending or conversion)")
+    ap.add_argument("--format", choices=sorted(_OUT_EXT), default="png",
+                    help="Output format; jpeg encodes much faster but is lossy")
+    ap.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                    help="Worker processes for decoding/drawing/encoding (1 = run inline)")
 
     args = ap.parse_args()
 
@@ -181,17 +323,27 @@ def main():
     out_root.mkdir(parents=True, exist_ok=True)
     csv_path.parent.mkdir(parents=True, exist_ok=True)
 
-    conn = sqlite3.connect(str(db_path))
+    # app.db.connect applies the shared PRAGMAs (64 MiB cache, in-memory temp
+    # store, mmap for local files) used by the annotations join
+    conn = connect(str(db_path))
     conn.row_factory = sqlite3.Row
 
-    records = fetch_annotations(conn)
-    if not records:
-        print("No annotations found. Nothing to do.")
-        return
-
     n_written = 0
     n_skipped = 0
     n_missing = 0
+    radius = 30
+    lw = 10
+
+    # Streamed: one image's records are held at a time
+    tasks = (
+        (image_id, recs, image_root, out_root, radius, lw, args.opaque, args.dry_run, args.format)
+        for _, image_id, recs in group_records(fetch_annotations(conn), False)
+    )
+    first = next(tasks, None)
+    if first is None:
+        print("No annotations found. Nothing to do.")
+        return
+    tasks = chain((first,), tasks)
 
     with open(csv_path, "w", newline="") as fcsv:
         writer = csv.writer(fcsv)
@@ -200,72 +352,32 @@ def main():
             "src_path", "out_path", "outcome_list", "points_px"
         ])
 
-        for group_key, image_id, recs in group_records(records, False):
-            # Accumulate points and outcomes for this output
-            outcomes: List[str] = []
-            pts_norm: List[Tuple[float, float]] = []
-            review_ids: List[int] = []
-            # All recs share same image_path in both modes
-            image_path_in_db = recs[0].image_path
-            src_path = resolve_input_path(image_path_in_db, image_root)
-
-            for r in recs:
-                review_ids.append(r.review_id)
-                if r.outcome:
-                    outcomes.append(str(r.outcome))
-                for p in r.points:
-                    pts_norm.append((p.x_norm, p.y_norm))
-
-            if not src_path.exists():
-                print(f"[MISSING] {src_path}")
-                n_missing += 1
-                continue
-
-            # Load image
-            try:
-                img = Image.open(src_path)
-                img.load()  # force read
-            except Exception as e:
-                print(f"[ERROR] Failed to open {src_path}: {e}")
-                n_missing += 1
-                continue
-
-            w, h = img.size
-            radius = 30
-            lw = 10
-
-            # Convert all points to pixel coordinates
-            pts_px = [norm_to_px(x, y, w, h) for (x, y) in pts_norm]
-
-            # Prepare output path
-            suffix = f"_ann"
-            out_path = make_output_path(src_path, out_root, image_root, suffix)
-            ensure_parent(out_path)
-
-            if not args.dry_run:
-                img_copy = img.copy()
-                draw_rings_on_image(img_copy, pts_px, radius, lw)
-                try:
-                    img_copy.save(out_path)
-                except Exception as e:
-                    print(f"[ERROR] Failed to save {out_path}: {e}")
+        # Decode/draw/encode is CPU-bound per image, so fan out over
+        # processes; results come back in order and only this process
+        # writes the manifest
+        workers = max(1, args.workers or 1)
+        if workers == 1:
+            results = map(render_group, tasks)
+            pool = None
+        else:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            results = render_all(pool, tasks, workers)
+        try:
+            for message, row in results:
+                if message:
+                    print(message)
+                if row is None:
                     n_missing += 1
                     continue
-            if(n_written%100 == 0):
-                print(f"Wrote {n_written} files")
-            n_written += 1
-
-            # Log CSV row (even on skip, to have a manifest)
-            writer.writerow([
-                image_id,
-                ";".join(str(x) for x in review_ids),
-                len(recs),
-                len(pts_px),
-                str(src_path),
-                str(out_path),
-                ";".join(outcomes) if outcomes else "",
-                ";".join(f"({x},{y})" for (x, y) in pts_px),
-            ])
+                if(n_written%100 == 0):
+                    print(f"Wrote {n_written} files")
+                n_written += 1
+
+                # Log CSV row (even on skip, to have a manifest)
+                writer.writerow(row)
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
 
     print("")
     print(f"Done. Wrote: {n_written}, Skipped (exists): {n_skipped}, Missing/Errors: {n_missing}")
@@ -273,4 +385,5 @@ def main():
 
 
 if __name__ == "__main__":
+    freeze_support()  # worker processes in a frozen Windows build
     main()
@@ -41,7 +41,7 @@ def main():
       3. Run a SELECT query joining `reviews` and `images`:
            - Includes only rows where `reviews.status='done'`.
            - Orders by decision timestamp for chronological reporting.
-      4. Write all rows to a UTF-8 encoded CSV file named `decisions.csv`.
+      4. Stream the rows to a UTF-8 encoded CSV file named `decisions.csv`.
 
     The file is overwritten each time the script runs.
 
@@ -51,20 +51,23 @@ def main():
     """
     cfg = load_config()
     con = connect(cfg["DB_PATH"])
-    rows = con.execute("""
+    # Stream straight from the cursor so memory stays flat however many
+    # reviews are done; rows come back in index order (no sort step)
+    cur = con.execute("""
       SELECT i.device_id, i.variant, r.review_id, r.image_id, i.path, r.assigned_to, r.batch_id, r.decided_at, r.result, r.standard_version, i.qc_flag
       FROM reviews r JOIN images i USING(image_id)
       WHERE r.status='done'
       ORDER BY r.decided_at
-    """).fetchall()
+    """)
     out_path = os.path.dirname(cfg["DB_PATH"])
     out_path += "/decisions.csv"
-    with open(out_path, "w", newline="", encoding="utf-8") as f:
+    with open(out_path, "w", newline="", encoding="utf-8", buffering=1 << 20) as f:
         w = csv.writer(f)
         w.writerow(
             ["device_id", "variant", "review id", "image id", "path", "user", "review batch", "timestamp", "Result", "ImageReview_version", "QC"]
         )
-        w.writerows(rows)
+        w.writerows(cur)
+    con.close()
     print("Wrote decisions.csv to root directory specified in config.ini")
 
 
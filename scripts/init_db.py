@@ -19,33 +19,66 @@ Behavior:
   * Logs the device_id suffix (e.g. '000' or '001') as the variant
   * Flags ~QC_RATE of images as QC duplicates and seeds two review rows.
   * Seeds exactly one review row for non-QC images.
-  * Re-running is idempotent: existing images/reviews are not duplicated.
+  * Re-running is idempotent: existing images/reviews are not duplicated, and
+    files whose path is already registered are not hashed again.
 
 Design notes:
   * The SHA-256 is used for integrity/duplicate detection and auditing.
-  * The filename regex extracts an 11-digit device_id for later reporting.
+  * The filename parser extracts an 11-digit device_id for later reporting.
   * All timestamps are UTC (`datetime('now')` in SQLite).
 """
 
-import hashlib, os, sqlite3, random
+import hashlib, json, os, sqlite3, random, threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from app.config import load_config
-from app.db import connect, ensure_schema, _set_user_version
-import re
+from app.db import _txn, connect, ensure_schema
 
-IMG_EXT = {".jpg", ".jpeg"}
+IMG_EXT = (".jpg", ".jpeg")
 
-pattern = re.compile(r"^(\d{11})_(\d{3})\.jpe?g$", re.IGNORECASE)
+# Images registered per transaction
+BATCH_SIZE = 1000
 
+# Hashing is I/O-bound on the share and releases the GIL
+HASH_WORKERS = min(32, (os.cpu_count() or 1) * 2)
 
-def sha256_file(path: str, block=1024 * 1024) -> str:
+
+def parse_name(name: str):
+    """Split `<11 digits>_<3 digits>.jpg|.jpeg` (any case) into (device_id, variant).
+
+    Equivalent to matching `^(\\d{11})_(\\d{3})\\.jpe?g$` with IGNORECASE, but
+    a few slice checks reject the common non-matching names without
+    entering the regex engine.
+
+    Returns:
+        tuple[str, str] or None: `(device_id, variant)`, or None if `name`
+        does not follow the pattern.
+    """
+    if (
+        len(name) in (19, 20)
+        and name[11] == "_"
+        and name[15:].lower() in IMG_EXT
+        and name[:11].isdecimal()
+        and name[12:15].isdecimal()
+    ):
+        return name[:11], name[12:15]
+    return None
+
+
+_buffers = threading.local()
+
+
+def sha256_file(path: str, block=4 * 1024 * 1024) -> str:
     """Compute the SHA-256 content hash of a file.
 
-    Reads the file in fixed-size blocks to avoid excessive memory use.
+    Reads the file in fixed-size blocks to avoid excessive memory use. Blocks
+    are read with `readinto` into a buffer reused per thread, unbuffered, so
+    the loop makes no allocations or extra copies.
 
     Args:
         path: Absolute or relative filesystem path to the file.
-        block: Read size in bytes for each chunk (defaults to 1 MiB).
+        block: Read size in bytes for each chunk (defaults to 4 MiB).
 
     Returns:
         Hex-encoded SHA-256 digest string of the file contents.
@@ -53,16 +86,135 @@ def sha256_file(path: str, block=1024 * 1024) -> str:
     Raises:
         OSError: If the file cannot be opened/read.
     """
+    buf = getattr(_buffers, "buf", None)
+    if buf is None or len(buf) != block:
+        buf = _buffers.buf = bytearray(block)
+    view = memoryview(buf)
     h = hashlib.sha256()
-    with open(path, "rb") as f:
-        while True:
-            b = f.read(block)
-            if not b:
-                break
-            h.update(b)
+    with open(path, "rb", buffering=0) as f:
+        while n := f.readinto(buf):
+            h.update(view[:n])
     return h.hexdigest()
 
 
+def iter_files(root: str):
+    """Yield a `DirEntry` for every non-directory under `root`.
+
+    Same order and rules as `os.walk(root)` (a directory's files before its
+    subdirectories, symlinked directories not followed, unreadable
+    directories skipped), but the entry's name, path and type come straight
+    from `os.scandir` with no extra joins or stat calls.
+    """
+    stack = [root]
+    while stack:
+        subdirs = []
+        try:
+            with os.scandir(stack.pop()) as it:
+                for e in it:
+                    try:
+                        is_dir = e.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if not is_dir:
+                        yield e
+                        continue
+                    # symlinked directories are listed by os.walk but not entered
+                    try:
+                        if not e.is_symlink():
+                            subdirs.append(e.path)
+                    except OSError:
+                        pass
+        except OSError:
+            continue
+        stack.extend(reversed(subdirs))
+
+
+def _hash_or_error(path: str):
+    """Return `(digest, None)`, or `(None, error)` if the file can't be read."""
+    try:
+        return sha256_file(path), None
+    except OSError as e:
+        return None, e
+
+
+def hash_files(items, workers: int = HASH_WORKERS):
+    """Hash files on a thread pool, yielding results in input order.
+
+    `hashlib` and file reads release the GIL, so several files hash at once
+    while the caller does its database work. At most `4 * workers` hashes
+    run ahead of the consumer, so `items` can be a lazy directory walk.
+
+    Args:
+        items: Iterable of tuples whose first element is the file path.
+        workers: Number of hashing threads.
+
+    Yields:
+        tuple: `(item, digest, error)`; exactly one of digest/error is None.
+    """
+    window = deque()
+    with ThreadPoolExecutor(workers, thread_name_prefix="sha256") as pool:
+        for item in items:
+            window.append((item, pool.submit(_hash_or_error, item[0])))
+            if len(window) >= 4 * workers:
+                item, fut = window.popleft()
+                yield (item, *fut.result())
+        while window:
+            item, fut = window.popleft()
+            yield (item, *fut.result())
+
+
+def insert_batch(con, batch) -> int:
+    """Register a batch of images and seed their review rows in one transaction.
+
+    Args:
+        con: SQLite connection (autocommit mode, as from `app.db.connect`).
+        batch: `(path, device_id, variant, sha256, qc_flag)` tuples.
+
+    Returns:
+        int: Number of images actually inserted (paths already present are
+        left untouched and get no new reviews).
+    """
+    with _txn(con):
+        # AUTOINCREMENT ids only grow, so rows above this are the new images
+        (last_id,) = con.execute("SELECT COALESCE(MAX(image_id), 0) FROM images;").fetchone()
+
+        # register images (QC flag included, no follow-up UPDATE)
+        inserted = con.executemany(
+            """
+            INSERT OR IGNORE INTO images(path, device_id, variant, sha256, qc_flag, registered_at)
+            VALUES (?,?,?,?,?, datetime('now'));
+            """,
+            batch,
+        ).rowcount
+
+        # ensure a devices row exists for each device_id
+        con.executemany(
+            """
+            INSERT OR IGNORE INTO devices(device_id, final_result)
+            VALUES (?, 'unknown');
+            """,
+            {(row[1],) for row in batch},
+        )
+
+        # seed exactly one review row for every new image, and a second,
+        # independent one for QC images
+        con.execute(
+            """
+            INSERT INTO reviews(image_id, status)
+            SELECT image_id, 'unassigned' FROM images WHERE image_id > ?;
+            """,
+            (last_id,),
+        )
+        con.execute(
+            """
+            INSERT INTO reviews(image_id, status)
+            SELECT image_id, 'unassigned' FROM images WHERE image_id > ? AND qc_flag = 1;
+            """,
+            (last_id,),
+        )
+    return inserted
+
+
 def main():
     """Scan the image root and seed the database with images and review rows.
 
@@ -70,19 +222,19 @@ def main():
       1) Load configuration (paths, QC rate, random seed).
       2) Connect to SQLite, ensure schema, and run migrations.
       3) Recursively walk the image root and filter acceptable files.
-      4) For each matching file:
-         - Insert into `images` if not present (path, device_id, variant, sha256, timestamp).
-         - Randomly flag as QC with probability QC_RATE.
-         - Seed one `reviews` row (status='unassigned').
-         - If QC, seed a second independent `reviews` row (still 'unassigned'),
-           but guard against >2 rows on re-runs.
+      4) For each matching file (hashed on a thread pool, written in
+         transactions of BATCH_SIZE images):
+         - Insert into `images` if not present (path, device_id, variant, sha256,
+           qc_flag, timestamp), with QC drawn with probability QC_RATE.
+         - Seed one `reviews` row (status='unassigned') per newly inserted image.
+         - If QC, seed a second independent `reviews` row (still 'unassigned').
 
     Logging:
       Prints counts of added and skipped files for quick operator feedback.
 
     Idempotency:
-      Uses `INSERT OR IGNORE` and a defensive LIMIT to prevent duplication if
-      re-run against the same dataset.
+      Uses `INSERT OR IGNORE`, and only images inserted by this run get review
+      rows, so re-running against the same dataset adds nothing.
     """
     cfg = load_config()
     qc_rate = cfg["QC_RATE"]          # CHANGED: read once here
@@ -90,108 +242,82 @@ def main():
 
     con = connect(cfg["DB_PATH"])
     ensure_schema(con, str(Path(__file__).resolve().parents[1] / "schema.sql"))
-    _set_user_version(con, 2)
 
     root = cfg["IMAGE_ROOT"]
     added = 0
     skipped = 0
     duplicate = 0
+    known = 0
 
-    print(f"Scanning all subfolders of: {root}")
-    for dirpath, _, files in os.walk(root):
-        for name in files:
-            ext = os.path.splitext(name)[1].lower()
-            if ext not in IMG_EXT:
+    def candidates():
+        nonlocal skipped, known
+        for entry in iter_files(root):
+            name = entry.name
+            if not name.lower().endswith(IMG_EXT):
                 continue
 
-            m = pattern.match(name)
+            parsed = parse_name(name)
 
             # Skip all non-matching filenames
-            if not m:
+            if parsed is None:
                 skipped += 1
                 if skipped % 100 == 0:
                     print(f"Skipped {skipped} images due to wrong file name")
                 continue
 
-            device_id = m.group(1)
-            variant = m.group(2)  # "image number for a given device"
-            full = os.path.join(dirpath, name)
-
-            try:
-                digest = sha256_file(str(full))
-
-                existing = con.execute(
-                    "SELECT path FROM images WHERE sha256=?",
-                    (digest,),
-                ).fetchone()
-
-                if existing:
-                    # print(f"[skip duplicate] {full} (same content as {existing[0]})")
-                    duplicate += 1
-                    if duplicate % 100 == 0:
-                        print(f"Skipped {duplicate} images as duplicates")
-                    continue
-
-                with con:
-                    # register image
-                    con.execute(
-                        """
-                        INSERT OR IGNORE INTO images(path, device_id, variant, sha256, registered_at)
-                        VALUES (?,?,?,?, datetime('now'));
-                        """,
-                        (full, device_id, variant, digest),
-                    )
-
-                    # NEW: ensure a devices row exists for this device_id
-                    con.execute(
-                        """
-                        INSERT OR IGNORE INTO devices(device_id, final_result)
-                        VALUES (?, 'unknown');
-                        """,
-                        (device_id,),
-                    )
-
-                    # set QC flag for this image
-                    qc_flag = 1 if random.random() < qc_rate else 0
-                    con.execute(
-                        "UPDATE images SET qc_flag=? WHERE path=?",
-                        (qc_flag, full),
-                    )
-
-                    # seed exactly one review row for every image
-                    con.execute(
-                        """
-                        INSERT OR IGNORE INTO reviews(image_id, status)
-                        SELECT image_id, 'unassigned' FROM images WHERE path=?;
-                        """,
-                        (full,),
-                    )
-
-                    # if QC, add the second row (but only if there are < 2 total)
-                    if qc_flag:
-                        con.execute(
-                            """
-                            INSERT INTO reviews(image_id, status)
-                            SELECT image_id, 'unassigned' FROM images
-                            WHERE path=?
-                              AND (
-                                    SELECT COUNT(*)
-                                    FROM reviews r
-                                    WHERE r.image_id = images.image_id
-                                  ) < 2;
-                            """,
-                            (full,),
-                        )
-
-                added += 1
-                if added % 100 == 0:
-                    print(f"Added {added} images so far")
-            except Exception as e:
-                print(f"[skip] {full}: {e}")
+            # A registered path is never re-inserted, so don't hash it again
+            full = entry.path
+            if con.execute("SELECT 1 FROM images WHERE path=?", (full,)).fetchone():
+                known += 1
+                continue
+
+            # (full path, device_id, variant = "image number for a given device")
+            yield (full, *parsed)
+
+    def flush(pending):
+        """Drop duplicates of `pending` in one lookup, draw QC flags, insert."""
+        nonlocal added, duplicate
+        registered = {
+            r[0] for r in con.execute(
+                "SELECT sha256 FROM images WHERE sha256 IN (SELECT value FROM json_each(?))",
+                (json.dumps([p[3] for p in pending]),),
+            )
+        }
+        rows = []  # (path, device_id, variant, sha256, qc_flag)
+        for full, device_id, variant, digest in pending:
+            if digest in registered:
+                # print(f"[skip duplicate] {full}")
+                duplicate += 1
+                if duplicate % 100 == 0:
+                    print(f"Skipped {duplicate} images as duplicates")
+                continue
+            registered.add(digest)  # later copies in this batch are duplicates too
+
+            # set QC flag for this image
+            qc_flag = 1 if random.random() < qc_rate else 0
+            rows.append((full, device_id, variant, digest, qc_flag))
+        if rows:
+            added += insert_batch(con, rows)
+
+    print(f"Scanning all subfolders of: {root}")
+    pending = []  # (path, device_id, variant, sha256)
+    for (full, device_id, variant), digest, error in hash_files(candidates()):
+        if error is not None:
+            print(f"[skip] {full}: {error}")
+            continue
+        pending.append((full, device_id, variant, digest))
+        if len(pending) >= BATCH_SIZE:
+            flush(pending)
+            print(f"Added {added} images so far")
+            pending.clear()
+
+    if pending:
+        flush(pending)
 
     print(f"Added {added} qualifying images.")
     print(f"Skipped {skipped} files.")
     print(f"Skipped {duplicate} duplicate files")
+    print(f"Skipped {known} already registered files")
 
 
 if __name__ == "__main__":
@@ -66,27 +66,22 @@ def verify_migration():
     fk_violations = con.execute("PRAGMA foreign_key_check;").fetchall()
     print(f"2. Foreign key violations: {len(fk_violations)} {'✓ NONE' if len(fk_violations) == 0 else '✗ FOUND'}")
 
-    # 3. Check orphaned reviews
-    orphaned_reviews = con.execute("""  
-        SELECT COUNT(*) FROM reviews r  
-        LEFT JOIN images i ON r.image_id = i.image_id  
-        WHERE i.image_id IS NULL  
-    """).fetchone()[0]
+    # 3-5. Orphaned reviews/annotations and totals in one round-trip; both
+    # orphan checks are primary-key probes (image_id, review_id are rowids)
+    (orphaned_reviews, orphaned_annotations,
+     image_count, review_count, annotation_count) = con.execute("""
+        SELECT
+          (SELECT COUNT(*) FROM reviews r
+            WHERE NOT EXISTS (SELECT 1 FROM images i WHERE i.image_id = r.image_id)),
+          (SELECT COUNT(*) FROM annotations a
+            WHERE NOT EXISTS (SELECT 1 FROM reviews r WHERE r.review_id = a.review_id)),
+          (SELECT COUNT(*) FROM images),
+          (SELECT COUNT(*) FROM reviews),
+          (SELECT COUNT(*) FROM annotations)
+    """).fetchone()
     print(f"3. Orphaned reviews: {orphaned_reviews} {'✓ NONE' if orphaned_reviews == 0 else '✗ FOUND'}")
-
-    # 4. Check orphaned annotations
-    orphaned_annotations = con.execute("""  
-        SELECT COUNT(*) FROM annotations a  
-        LEFT JOIN reviews r ON a.review_id = r.review_id  
-        WHERE r.review_id IS NULL  
-    """).fetchone()[0]
     print(f"4. Orphaned annotations: {orphaned_annotations} {'✓ NONE' if orphaned_annotations == 0 else '✗ FOUND'}")
 
-    # 5. Count totals
-    image_count = con.execute("SELECT COUNT(*) FROM images").fetchone()[0]
-    review_count = con.execute("SELECT COUNT(*) FROM reviews").fetchone()[0]
-    annotation_count = con.execute("SELECT COUNT(*) FROM annotations").fetchone()[0]
-
     print(f"\n=== Data Counts ===")
     print(f"Images: {image_count}")
     print(f"Reviews: {review_count}")
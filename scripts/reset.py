@@ -27,12 +27,17 @@ Usage:
 from __future__ import annotations
 import argparse
 import csv
+import json
+import re
 import sqlite3
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable, List, Set, Tuple
 from app.config import load_config
 
+# Same filename rule as init_db.py; only matching files are ever ingested
+FILENAME_RE = re.compile(r"^(\d{11})_(\d{3})\.jpe?g$", re.IGNORECASE)
+
 @dataclass
 class Targets:
     image_ids: Set[int]
@@ -69,43 +74,62 @@ def read_targets(csv_path: Path) -> Targets:
         return Targets(image_ids, paths, filenames, device_ids)
 
 
+_SQL_TARGET_DEVICES = """
+-- image_id → device_id
+SELECT device_id FROM images
+WHERE image_id IN (SELECT value FROM json_each(:image_ids))
+UNION
+-- path (exact match) → device_id
+SELECT device_id FROM images
+WHERE path IN (SELECT value FROM json_each(:paths))
+UNION
+-- filename (basename) → device_id: ingested names are always
+-- "<device_id>_<variant>.jpg", so each one is a UNIQUE(device_id, variant)
+-- index probe; the stored basename is then confirmed (either separator,
+-- ASCII case-insensitive like LIKE)
+SELECT i.device_id
+FROM (
+    SELECT json_extract(value, '$[0]') AS device_id,
+           json_extract(value, '$[1]') AS variant,
+           json_extract(value, '$[2]') AS name
+    FROM json_each(:names)
+) AS k
+JOIN images i ON i.device_id = k.device_id AND i.variant = k.variant
+WHERE lower(substr(i.path, -length(k.name))) = lower(k.name)
+  AND substr(i.path, -length(k.name) - 1, 1) IN ('/', char(92))  -- char(92) = backslash
+"""
+
+
 def collect_device_ids(conn: sqlite3.Connection, t: Targets) -> Set[str]:
+    """Resolve every CSV target kind to device_ids in a single query."""
     device_ids: Set[str] = set(t.device_ids)
 
-    # image_id → device_id
-    if t.image_ids:
-        q = (
-                "SELECT DISTINCT device_id FROM images WHERE image_id IN ("
-                + ",".join(["?"] * len(t.image_ids))
-                + ")"
+    names = []
+    unmatched = []
+    for name in sorted(t.filenames):
+        m = FILENAME_RE.match(name)
+        if m:
+            names.append((m.group(1), m.group(2), name))
+        else:
+            unmatched.append(name)
+    if unmatched:
+        # such files are never ingested, so these rows can't match any image
+        print(
+            f"Warning: {len(unmatched)} filename(s) don't match <11 digits>_<3 digits>.jpg "
+            f"and were ignored: {', '.join(unmatched)}"
         )
-        rows = conn.execute(q, tuple(sorted(t.image_ids))).fetchall()
-        device_ids.update(r[0] for r in rows)
 
-    # path (exact match) → device_id
-    if t.paths:
-        q = (
-                "SELECT DISTINCT device_id FROM images WHERE path IN ("
-                + ",".join(["?"] * len(t.paths))
-                + ")"
-        )
-        rows = conn.execute(q, tuple(sorted(t.paths))).fetchall()
+    if t.image_ids or t.paths or names:
+        rows = conn.execute(
+            _SQL_TARGET_DEVICES,
+            {
+                "image_ids": json.dumps(sorted(t.image_ids)),
+                "paths": json.dumps(sorted(t.paths)),
+                "names": json.dumps(names),
+            },
+        ).fetchall()
         device_ids.update(r[0] for r in rows)
 
-    # filename (basename) → device_id (may match multiple rows)
-    if t.filenames:
-        placeholders = ",".join(["?"] * len(t.filenames))
-        q = f"SELECT DISTINCT device_id FROM images WHERE substr(path, length(path) - instr(reverse(path), '/') + 2) IN ({placeholders}) OR path LIKE '%' || ?"
-        # The above is messy across OSes; prefer simpler portable approach instead:
-        # Fetch by LIKE matching end-of-path.
-        device_rows = []
-        for name in t.filenames:
-            device_rows += conn.execute(
-                "SELECT DISTINCT device_id FROM images WHERE path LIKE ?",
-                (f"%/{name}",),
-            ).fetchall()
-        device_ids.update(r[0] for r in device_rows)
-
     return {d for d in device_ids if d is not None and str(d) != ""}
 
 
@@ -113,26 +137,27 @@ def review_ids_for_device_ids(conn: sqlite3.Connection, device_ids: Iterable[str
     device_ids = list(device_ids)
     if not device_ids:
         return []
-    placeholders = ",".join(["?"] * len(device_ids))
-    q = f"""
+    q = """
         SELECT r.review_id
         FROM reviews r
         JOIN images i ON i.image_id = r.image_id
-        WHERE i.device_id IN ({placeholders})
+        WHERE i.device_id IN (SELECT value FROM json_each(?))
         """
-    rows = conn.execute(q, tuple(device_ids)).fetchall()
+    rows = conn.execute(q, (json.dumps(device_ids),)).fetchall()
     return [int(r[0]) for r in rows]
 
 
 def reset_reviews_and_annotations(conn: sqlite3.Connection, review_ids: List[int], dry_run: bool) -> Tuple[int, int]:
     if not review_ids:
         return (0, 0)
-    placeholders = ",".join(["?"] * len(review_ids))
+    # One JSON array bind keeps the SQL text constant (statement-cache
+    # friendly) and sidesteps SQLite's host-parameter limit
+    ids = (json.dumps(review_ids),)
 
     # Count annotations to be deleted (for logging)
     (ann_cnt,) = conn.execute(
-        f"SELECT COUNT(*) FROM annotations WHERE review_id IN ({placeholders})",
-        tuple(review_ids),
+        "SELECT COUNT(*) FROM annotations WHERE review_id IN (SELECT value FROM json_each(?))",
+        ids,
     ).fetchone()
 
     if dry_run:
@@ -142,12 +167,12 @@ def reset_reviews_and_annotations(conn: sqlite3.Connection, review_ids: List[int
         conn.execute("PRAGMA defer_foreign_keys=ON")
         # Remove annotations for those reviews
         conn.execute(
-            f"DELETE FROM annotations WHERE review_id IN ({placeholders})",
-            tuple(review_ids),
+            "DELETE FROM annotations WHERE review_id IN (SELECT value FROM json_each(?))",
+            ids,
         )
         # Reset the review rows to pristine state
         conn.execute(
-            f"""
+            """
             UPDATE reviews
                SET status='unassigned',
                    result=NULL,
@@ -155,17 +180,15 @@ def reset_reviews_and_annotations(conn: sqlite3.Connection, review_ids: List[int
                    batch_id=NULL,
                    decided_at=NULL,
                    standard_version=NULL
-             WHERE review_id IN ({placeholders})
+             WHERE review_id IN (SELECT value FROM json_each(?))
             """,
-            tuple(review_ids),
+            ids,
         )
     return len(review_ids), int(ann_cnt)
 
 def reset_device_decisions(conn: sqlite3.Connection, device_ids: List[int], dry_run: bool) -> int:
     if not device_ids:
         return 0
-    placeholders = ",".join(["?"] * len(device_ids))
-
     if dry_run:
         return len(device_ids)
 
@@ -173,15 +196,15 @@ def reset_device_decisions(conn: sqlite3.Connection, device_ids: List[int], dry_
         conn.execute("PRAGMA defer_foreign_keys=ON")
 
         conn.execute(
-            f"""
+            """
             UPDATE devices
                 SET final_result='unknown',
                     final_decision_source_image_id=NULL,
                     decided_at=NULL,
                     notes=NULL
-            WHERE device_id IN ({placeholders})
+            WHERE device_id IN (SELECT value FROM json_each(?))
             """,
-            tuple(device_ids),
+            (json.dumps(device_ids),),
         )
     return len(device_ids)
 